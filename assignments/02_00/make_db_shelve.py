@@ -1,7 +1,5 @@
 from initdata import data
-import shelve
-db = shelve.open('weather-shelve.dat')
+import weatherdb
+db = weatherdb.open('weather.db')
 db['set01'] = data
 db.close()
-
-
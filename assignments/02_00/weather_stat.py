@@ -1,51 +1,74 @@
-import shelve
-db = shelve.open('weather-shelve.dat')
+import sys, io, json, csv, time
+from functools import lru_cache
+from itertools import chain
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+from getopt import gnu_getopt, GetoptError
+
+import weatherdb
+
+db_path = 'weather.db'
+db = None   # opened when first used, so each worker process opens its own
+
+
+def get_db():
+    global db
+    if db is None:
+        db = weatherdb.open(db_path, 'r')
+    return db
+
+
+class Dataset:
+    """All the stats of one data set of cities by 12 months, worked out once.
+
+    The city x month rows are viewed as city x season x month, with mps
+    months in each season, and every yearly and season average, max and
+    min and the orderings across cities are calculated in one pass.
+    """
+
+    def __init__(self, data, mps=3):
+        self.data = data
+        self.seasons = [[row[m:m + mps] for m in range(0, len(data[0]), mps)]
+                        for row in data]
+        self.year_avg = [round(sum(row) / len(data[0]), 2) for row in data]
+        self.season_avg = [[round(sum(ses) / mps, 2) for ses in city] for city in self.seasons]
+        self.season_max = [[max(ses) for ses in city] for city in self.seasons]
+        self.season_min = [[min(ses) for ses in city] for city in self.seasons]
+        self.avg_across = [round(sum(col) / len(col), 2) for col in zip(*self.season_avg)]
+        self.ordered_avg = [sorted(city, reverse=True) for city in self.season_avg]
+
+
+@lru_cache(maxsize=256)
+def dataset(key):
+    return Dataset(get_db()[key])
 
 
 def cal_year_avg(key):
-    return [round(a/len(db[key][0]), 2) for a in list(map(sum, db[key]))]
+    return list(dataset(key).year_avg)
 
 
 def cal_ses_avg(key):
-    return [round(sum(ses) / 3, 2) for ses in chop_seasons(key)]
+    return list(chain.from_iterable(dataset(key).season_avg))
 
 
 def find_max_ses(key):
-    return [max(ses) for ses in chop_seasons(key)]
+    return list(chain.from_iterable(dataset(key).season_max))
 
 
 def find_min_ses(key):
-    return [min(ses) for ses in chop_seasons(key)]
+    return list(chain.from_iterable(dataset(key).season_min))
 
 
 def find_avg_across_all_city(key):
-    season_avg = cal_ses_avg(key)
-    i = 0
-    res = []
-    while i < len(season_avg):
-        res.append(season_avg[i:i + 4])
-        i += 4
-
-    return [round(sum(col) / len(col), 2) for col in list(zip(*res))]
+    return list(dataset(key).avg_across)
 
 
 def order_ses_avg(key):
-    res = []
-    avg_temp = [round(sum(ses) / 3, 2) for ses in chop_seasons(key)]
-    i = 0
-    while i < len(avg_temp):
-        res += (sorted(avg_temp[i:i+4], reverse=True))
-        i += 4
-    return res
+    return list(chain.from_iterable(dataset(key).ordered_avg))
 
 
 def chop_seasons(key):
-    season = [slice(0, 3), slice(3, 6), slice(6, 9), slice(9, 12)]
-    res = []
-    for data in db[key]:
-        for each_ses in season:
-            res.append(data[each_ses])
-    return res
+    return list(chain.from_iterable(dataset(key).seasons))
 
 
 def display_yearly_avg(key):
@@ -117,19 +140,114 @@ def display_des_order(key):
         # print(("{:>8} {:>8}".format(res[i], '> ')), end='')
 
 
-if __name__ == '__main__':
-    display_yearly_avg('set01')
+def report(key):
+    display_yearly_avg(key)
     print('\n')
-    display_ses_avg_across_city('set01')
+    display_ses_avg_across_city(key)
     print('\n')
-    display_ses_des_order_all_city('set01')
+    display_ses_des_order_all_city(key)
     print('\n')
-    display_season_avg('set01')
+    display_season_avg(key)
     print('\n')
-    display_max_temp('set01')
+    display_max_temp(key)
     print('\n')
-    display_min_temp('set01')
+    display_min_temp(key)
     print('\n')
-    display_des_order('set01')
+    display_des_order(key)
+
+
+def dataset_stats(key):
+    ds = dataset(key)
+    across = ds.avg_across
+    return {
+        'key': key,
+        'cities': len(ds.data),
+        'year_avg': ds.year_avg,
+        'season_avg': ds.season_avg,
+        'season_max': ds.season_max,
+        'season_min': ds.season_min,
+        'season_avg_across': across,
+        'max_season': across.index(max(across)) + 1,
+        'min_season': across.index(min(across)) + 1,
+        'season_order': [across.index(t) + 1 for t in sorted(across, reverse=True)],
+    }
+
+
+# worker for batch mode, gets the stats and the text report of one data set
+def batch_one(key):
+    text = io.StringIO()
+    with redirect_stdout(text):
+        report(key)
+    return dataset_stats(key), text.getvalue()
+
+
+# write the stats as one CSV row per city and season
+def write_csv(out, results):
+    w = csv.writer(out)
+    w.writerow(['key', 'city', 'season', 'year_avg', 'season_avg', 'season_max', 'season_min'])
+    for st in results:
+        for c in range(st['cities']):
+            for s in range(len(st['season_avg'][c])):
+                w.writerow([st['key'], c + 1, s + 1, st['year_avg'][c], st['season_avg'][c][s],
+                            st['season_max'][c][s], st['season_min'][c][s]])
+
+
+# report on every data set in the database using a pool of processes
+#   stats go to outpath as JSON Lines, or CSV if it ends with .csv,
+#   and the text reports go to reportfile
+def batch(jobs=None, outpath=None, reportfile=sys.stdout):
+    global db
+    start = time.time()
+    keys = sorted(get_db())
+    db.close()      # do not share the connection with the workers
+    db = None
+    results = []
+    with Pool(jobs) as pool:
+        for st, text in pool.imap(batch_one, keys, chunksize=max(1, len(keys) // 64)):
+            print('=== {} ===\n'.format(st['key']), file=reportfile)
+            print(text, file=reportfile)
+            results.append(st)
+    if outpath:
+        with open(outpath, 'w', newline='') as out:
+            if outpath.endswith('.csv'):
+                write_csv(out, results)
+            else:
+                for st in results:
+                    out.write(json.dumps(st) + '\n')
+    took = time.time() - start
+    print('{} datasets in {:.2f} seconds, {:.1f} datasets/second'.format(
+          len(keys), took, len(keys) / took if took else 0), file=sys.stderr)
+
+
+usage = """Usage: weather_stat.py [ --batch [ -j <num> ] [ -o <stats> ] [ -r <report> ] ]
+
+    Without --batch print the report for data set 'set01'.
+
+    --batch reports on every data set in the database, using -j worker
+    processes (the number of CPUs by default). The stats of all data sets
+    are written to the -o file as JSON Lines, or as CSV if the file name
+    ends with .csv, and the text reports go to the -r file or stdout.
+"""
 
-db.close()
+if __name__ == '__main__':
+    try:
+        opts, args = gnu_getopt(sys.argv[1:], 'hj:o:r:', ['batch'])
+        opts = dict(opts)
+        jobs = int(opts['-j']) if '-j' in opts else None
+        if jobs is not None and jobs < 1: raise ValueError('-j needs a number of at least 1')
+    except (GetoptError, ValueError) as e:
+        print(e, '\n\n' + usage, file=sys.stderr)
+        exit(1)
+    if '-h' in opts or args:
+        print(usage)
+        exit(0 if '-h' in opts else 1)
+    if '--batch' in opts:
+        if '-r' in opts:
+            with open(opts['-r'], 'w') as reportfile:
+                batch(jobs, opts.get('-o'), reportfile)
+        else:
+            batch(jobs, opts.get('-o'))
+    else:
+        report('set01')
+    if db is not None:
+        db.close()
@@ -0,0 +1,147 @@
+"""Indexed store of weather data sets, a faster replacement for shelve.
+
+Each data set is a list of cities, each a list of monthly numbers. The
+store is an SQLite file where every city is kept as one packed binary
+array blob, indexed on (key, city), so one city or a slice of months
+can be read without unpickling the rest of the data set:
+
+    import weatherdb
+
+    db = weatherdb.open('weather.db')
+    db['set01'] = data              # like a shelve
+    print(db['set01'][2])           # whole data set
+    print(db.city('set01', 2))      # only city 2
+    print(db.months('set01', 2, 3, 6))  # only months 3 to 5 of city 2
+    db.close()
+
+Data sets of all ints are kept as 64 bit ints and come back as ints,
+otherwise as 64 bit floats. The file is opened in WAL mode so several
+processes can read and add data sets at the same time.
+"""
+
+import sqlite3, sys
+from array import array
+from collections.abc import MutableMapping
+from urllib.parse import quote
+
+# set up the tables if the file is new
+schema = """
+create table if not exists datasets (
+    key      text primary key,
+    cities   integer not null,
+    months   integer not null,
+    typecode text not null
+);
+create table if not exists cities (
+    key     text not null references datasets(key) on delete cascade,
+    city    integer not null,
+    data    blob not null,
+    primary key (key, city)
+) without rowid;
+"""
+
+
+# pack a row of numbers as little endian binary
+def pack(row, typecode):
+    arr = array(typecode, row)
+    if sys.byteorder == 'big': arr.byteswap()
+    return arr.tobytes()
+
+
+# unpack little endian binary to a list of numbers
+def unpack(blob, typecode):
+    arr = array(typecode)
+    arr.frombytes(blob)
+    if sys.byteorder == 'big': arr.byteswap()
+    return arr.tolist()
+
+
+class WeatherDB(MutableMapping):
+    """Dict-like store of data sets, keyed on strings like a shelve."""
+
+    def __init__(self, path, flag='c', timeout=30):
+        mode = { 'r': 'ro', 'w': 'rw', 'c': 'rwc', 'n': 'rwc' }[flag]
+        self.path = path
+        self.conn = sqlite3.connect('file:%s?mode=%s' % (quote(path), mode),
+                                    uri=True, timeout=timeout)
+        self.conn.execute('pragma foreign_keys = on')
+        self.conn.execute('pragma mmap_size = %d' % (1 << 28))  # map the file for reads
+        if flag != 'r':
+            self.conn.execute('pragma journal_mode = wal')
+            if flag == 'n':     # always start with no data sets
+                self.conn.executescript('drop table if exists cities; '
+                                        'drop table if exists datasets;')
+            self.conn.executescript(schema)
+
+    def _info(self, key):
+        found = self.conn.execute('select cities, months, typecode from datasets '
+                                  'where key = ?', (key,)).fetchone()
+        if found is None: raise KeyError(key)
+        return found
+
+    def __getitem__(self, key):
+        cities, months, typecode = self._info(key)
+        return [unpack(blob, typecode) for (blob,) in self.conn.execute(
+                'select data from cities where key = ? order by city', (key,))]
+
+    def __setitem__(self, key, data):
+        data = [list(row) for row in data]
+        typecode = 'q' if all(type(v) == int for row in data for v in row) else 'd'
+        months = max(map(len, data), default=0)
+        with self.conn:     # one transaction, so readers never see half a set
+            self.conn.execute('delete from datasets where key = ?', (key,))
+            self.conn.execute('insert into datasets values (?, ?, ?, ?)',
+                              (key, len(data), months, typecode))
+            self.conn.executemany('insert into cities values (?, ?, ?)',
+                                  [(key, i, pack(row, typecode)) for i, row in enumerate(data)])
+
+    def __delitem__(self, key):
+        with self.conn:
+            if not self.conn.execute('delete from datasets where key = ?', (key,)).rowcount:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.conn.execute('select 1 from datasets where key = ?',
+                                 (key,)).fetchone() is not None
+
+    def __iter__(self):
+        return (key for (key,) in self.conn.execute('select key from datasets order by key'))
+
+    def __len__(self):
+        return self.conn.execute('select count(*) from datasets').fetchone()[0]
+
+    def city(self, key, city):
+        """Get the months of one city of a data set."""
+        return self.months(key, city)
+
+    def months(self, key, city, start=0, stop=None):
+        """Get months start to stop-1 of one city, like row[start:stop].
+
+        Only those months are read from the file. Negative indexes count
+        back from the end of the longest city in the data set.
+        """
+        cities, months, typecode = self._info(key)
+        start, stop, step = slice(start, stop).indices(months)
+        size = array(typecode).itemsize
+        found = self.conn.execute('select substr(data, ?, ?) from cities '
+                                  'where key = ? and city = ?',
+                                  (start * size + 1, max(0, stop - start) * size, key, city)).fetchone()
+        if found is None: raise IndexError('city index out of range')
+        return unpack(found[0], typecode)
+
+    def sync(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open(path, flag='c', timeout=30):
+    """Open a store like shelve.open(), flag is 'r', 'w', 'c' or 'n'."""
+    return WeatherDB(path, flag, timeout)
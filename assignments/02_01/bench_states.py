@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Benchmark state ingest on synthetic data from 10k up to 10M rows.
+
+Usage: bench_states.py [ <max rows> ] [ <max rows for old list ingest> ]
+
+The number of distinct state names grows with the rows (one per 20
+rows), so the largest files have hundreds of thousands of them. The old
+ingest, which checked a list of names for every row, is quadratic in
+the number of states so it is only run up to a smaller size.
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '06_01'))
+from states import read_states
+from weathergen import write_csv
+
+
+def old_ingest(f):
+    # the original list membership ingest, for comparison
+    data = list(csv.reader(f))
+    stat_nam, pro_max, pro_min = [], {}, {}
+    for i in range(1, len(data)):
+        row = ''.join(data[i]).split(';')
+        name = row[8]
+        maxv = (float(row[6])-32)*5/9
+        minv = (float(row[7])-32)*5/9
+        if name in stat_nam:
+            if maxv > pro_max[name][0]:
+                pro_max[name] = [maxv]
+            if minv < pro_min[name][0]:
+                pro_min[name] = [minv]
+        elif name != '"0"':
+            stat_nam.append(name)
+            pro_max[name] = [maxv]
+            pro_min[name] = [minv]
+    return len(stat_nam)
+
+
+def timed(func, path):
+    with open(path, newline='') as f:
+        start = time.time()
+        func(f)
+        return time.time() - start
+
+
+max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+max_old = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+print('{:>10} {:>9} {:>10} {:>12} {:>10}'.format(
+      'rows', 'states', 'seconds', 'rows/s', 'old secs'))
+rows = 10000
+while rows <= max_rows:
+    states = rows // 20
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_csv(path, rows, states, states=states)
+        took = timed(lambda f: read_states(f), path)
+        old = '{:10.3f}'.format(timed(old_ingest, path)) if rows <= max_old else '{:>10}'.format('-')
+        print('{:>10,} {:>9,} {:10.3f} {:12,.0f} {}'.format(
+              rows, states, took, rows / took, old), flush=True)
+    finally:
+        os.remove(path)
+    rows *= 10
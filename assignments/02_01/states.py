@@ -0,0 +1,105 @@
+import csv
+from aggregate import Stats
+from csvsimple import csv_rows, csv_blocks, csv_column_blocks
+from colcache import load_columns, CacheWriter
+from compressed import open_input
+
+# positions of the fields used: state name, state code, max temp,
+# min temp, lon and lat
+state_cols = (8, 10, 6, 7, 2, 3)
+
+
+class StateIndex:
+    """Hashed index of state names with max/min temperature of each.
+
+    States are kept in the order they were first seen, with the state
+    code of each, so output can list them in file order. Looking up a
+    state is a dict lookup, so ingest is linear in the number of rows
+    no matter how many distinct states there are.
+    """
+
+    def __init__(self):
+        self.codes = {}     # state name -> state code, in first seen order
+        self.highs = {}     # state name -> Stats of max temps, (lon, lat) payload
+        self.lows = {}      # state name -> Stats of min temps, (lon, lat) payload
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, name):
+        return name in self.codes
+
+    def add(self, name, code, maxv, minv, loc):
+        hi = self.highs.get(name)
+        if hi is None:
+            self.codes[name] = code
+            hi = self.highs[name] = Stats()
+            self.lows[name] = Stats()
+        hi.add(maxv, loc)
+        self.lows[name].add(minv, loc)
+
+
+def read_states(f, sep=';'):
+    """Stream ';' separated rows from an open file into a StateIndex.
+
+    Rows with the state name "0" (airports) are skipped. Returns the index, the
+    number of lines read including the header, and the number of columns.
+    """
+    reader = csv.reader(f, delimiter=sep)
+    head = next(reader)
+    index = StateIndex()
+    add = index.add
+    samples = 1
+    for row in reader:
+        samples += 1
+        name = row[8]
+        if name == '0':
+            continue
+        add(name, row[10],
+            (float(row[6])-32)*5/9,             # max temp in celsius
+            (float(row[7])-32)*5/9,             # min temp in celsius
+            (float(row[2]), float(row[3])))     # lon, lat
+    return index, samples, len(head)
+
+
+def read_state_columns(blocks, head):
+    """Make a StateIndex from blocks of columns, like read_states().
+
+    Each block is a dict of columns keyed on the field names in head,
+    but only the fields used are needed.
+    """
+    names = [head[i] for i in state_cols]
+    index = StateIndex()
+    add = index.add
+    samples = 1
+    for cols in blocks:
+        if not cols:
+            continue
+        samples += len(cols[names[0]])
+        for name, code, maxv, minv, lon, lat in zip(*[cols[n] for n in names]):
+            if name == '0' or name == 0:   # quoted or unquoted airport
+                continue
+            add(name, code, (maxv-32)*5/9, (minv-32)*5/9, (lon, lat))
+    return index, samples, len(head)
+
+
+def read_cached_states(path, rebuild=False, sep=';'):
+    """Make a StateIndex from a file path like read_states(), through the column cache.
+
+    The fields used are loaded from the cache if the file has not
+    changed. Otherwise the file, which may be gzip, bz2, xz or zstd
+    compressed, is parsed a block at a time and the blocks are written
+    to the cache as they go. Also returns 'loaded' or 'saved' for what
+    was done with the cache, or None if it could not be saved.
+    """
+    with open_input(path) as f:
+        head = next(csv_rows([f.readline()], sep))
+        if not rebuild:
+            columns = load_columns(path, use_mmap=True,
+                                   fields=[head[i] for i in state_cols])
+            if columns is not None:
+                return read_state_columns([columns], head) + ('loaded',)
+        cache = CacheWriter(path)
+        blocks = cache.tee(csv_column_blocks(csv_blocks(f), sep, head))
+        found = read_state_columns(blocks, head)
+    return found + ('saved' if cache.stored else None,)
@@ -1,59 +1,53 @@
 #!/usr/bin/python3
-import csv
+import os
 import time
-import matplotlib.pyplot as plt
-import gmplot
 import sys
+from getopt import gnu_getopt, GetoptError
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '06_01'))
+from states import read_states, read_cached_states
+from compressed import open_input
+from ranking import Ranking
 start_time = time.time()
 try:
-    datafile = sys.argv[1]
-except IndexError:
+    opts, args = gnu_getopt(sys.argv[1:], '', ['no-cache', 'rebuild-cache', 'no-graphs'])
+    opts = dict(opts)
+    datafile = args[0]
+except (GetoptError, IndexError):
     print("expecting two arguments")
+    print("usage: us_weather.py [--no-cache | --rebuild-cache] [--no-graphs] data.csv")
     exit(1)
 
 print("*Parsing data file...")
-with open(datafile, 'r') as f:
-    reader = csv.reader(f)
-    data = list(reader)
-stat_nam = []
-pro_max = {}
-pro_min = {}
-state = []
-for i in range(1, len(data)):
-        row = ''.join(data[i]).split(';')
-        name = row[8]
-        maxv = (float(row[6])-32)*5/9
-        minv = (float(row[7])-32)*5/9
-        lon = float(row[2])
-        lat = float(row[3])
-        st = row[10]
-        if name in stat_nam:
-            if maxv > pro_max[name][0]:
-                pro_max[name] = [maxv, lon, lat]
-            if minv < pro_min[name][0]:
-                pro_min[name] = [minv, lon, lat]
-        else:
-            if name != '"0"':
-                stat_nam.append(name)
-                state.append(st)
-                pro_max[name] = [maxv, lon, lat]
-                pro_min[name] = [minv, lon, lat]
-
-print('**Total samples parsed = {} '.format(len(data)))
-print('**Total columns parsed = {}'.format(len(''.join(data[0]).split(';'))))
+if '--no-cache' in opts:
+    with open_input(datafile, 'r', newline='') as f:   # may be compressed
+        index, samples, columns = read_states(f)
+else:
+    # parsed columns are cached on disk and reused while the file is unchanged
+    index, samples, columns, cache = read_cached_states(datafile, '--rebuild-cache' in opts)
+    if cache:
+        print('**{} the column cache'.format('Loaded from' if cache == 'loaded' else 'Saved to'))
+pro_max = index.highs  # max temp of each state with the (lon, lat) it was at
+pro_min = index.lows   # min temp of each state with the (lon, lat) it was at
+state = list(index.codes.values())
+
+print('**Total samples parsed = {} '.format(samples))
+print('**Total columns parsed = {}'.format(columns))
 print('**Total time parsing data file from CSV format = {:.8f} seconds'.format(time.time() - start_time))
 print('Generating information....')
 print('Total states = {}'.format(len(set(state))-1))  # strip off the coma at the end
 
 
-max_v = [(nam, pro_max[nam][0]) for nam in sorted(pro_max, key=pro_max.get, reverse=True)]
-min_v = [(nam, pro_min[nam][0]) for nam in sorted(pro_min, key=pro_min.get)]
-max_by_state = sorted(max_v, key=lambda x: x[0])  # sort temp by state name - alphabetic order
-min_by_state = sorted(min_v, key=lambda x: x[0])
-Location = [(e[1], e[2]) for e in pro_max.values()]  # Locations of all highest temperature across America
-
-max_ten = max_v[:10]
-min_ten = min_v[:10]
+# the ten highest and lowest states by temperature, ties broken by location
+max_rank = Ranking(pro_max)
+min_rank = Ranking(pro_min)
+max_ten = [(nam, pro_max[nam].max) for nam in
+           max_rank.top(10, lambda n: (pro_max[n].max,) + pro_max[n].argmax)]
+min_ten = [(nam, pro_min[nam].min) for nam in
+           min_rank.bottom(10, lambda n: (pro_min[n].min,) + pro_min[n].argmin)]
+# temp by state name - alphabetic order
+max_by_state = [(nam, pro_max[nam].max) for nam in max_rank.asc()]
+min_by_state = [(nam, pro_min[nam].min) for nam in min_rank.asc()]
+Location = [e.argmax for e in pro_max.values()]  # Locations of all highest temperature across America
 
 
 def display_info(t_arr):
@@ -64,7 +58,10 @@ def display_info(t_arr):
     print('\n')
 
 
+# the map and plotting libraries are slow to import, so they are only
+# imported when a graph is made, not for --no-graphs
 def draw_heat_map(locat):
+    import gmplot
     gmap = gmplot.GoogleMapPlotter(locat[0][0], locat[0][1], 4)
     lats, lons = zip(*Location)
     gmap.heatmap(lats, lons)
@@ -72,6 +69,7 @@ def draw_heat_map(locat):
 
 
 def plot_bar_chart(lis, la_x, la_y, f_name, title):
+    import matplotlib.pyplot as plt
     plt.xlabel(la_x)
     plt.xticks(rotation='vertical', fontsize=8)
     plt.ylabel(la_y)
@@ -89,11 +87,12 @@ def plot_bar_chart(lis, la_x, la_y, f_name, title):
 
 display_info(max_ten)
 display_info(min_ten)
-plot_bar_chart(max_by_state, 'State Name', 'Max Temp in \u00b0c', 'States_max_temp',
-               'Max temperature of each state in the US')
-plot_bar_chart(min_by_state, 'State Name', 'Min Temp in \u00b0c', 'States_min_temp',
-               'Min temperature of each state in the US')
-draw_heat_map(Location)
+if '--no-graphs' not in opts:
+    plot_bar_chart(max_by_state, 'State Name', 'Max Temp in \u00b0c', 'States_max_temp',
+                   'Max temperature of each state in the US')
+    plot_bar_chart(min_by_state, 'State Name', 'Min Temp in \u00b0c', 'States_min_temp',
+                   'Min temperature of each state in the US')
+    draw_heat_map(Location)
 print('**Total time of getting all outputs = {:.8f} seconds'.format(time.time() - start_time))
 
 
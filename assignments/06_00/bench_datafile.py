@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+r"""
+Benchmark the block parser of datafile.py on a generated data file.
+
+Compares the old way of reading the file a line at a time with two
+re.sub() calls per line and map(float, ...), with read_blocks(), both
+reading the same file into arrays of values and row lengths.
+
+Usage: bench_datafile.py [ <megabytes> ]    (default 1024, a 1 GB file)
+"""
+
+import sys, time, os, re, random, tempfile
+from array import array
+
+from datafile import read_blocks
+
+megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1024
+
+# write about size bytes of rows of 12 months, with comments, blank
+# lines, commas, and some short rows like the test files
+def write_data(path, size):
+    rnd = random.Random(1)
+    lines = []
+    for i in range(1000):
+        row = [ str(rnd.randint(-15, 35)) for _ in range(rnd.choice([12] * 9 + [7])) ]
+        sep = ', ' if i % 3 == 0 else ' '
+        line = sep.join(row)
+        if i % 10 == 0: line += '   # city %d' % i
+        lines.append(line)
+        if i % 50 == 0: lines.append('# more cities')
+        if i % 70 == 0: lines.append('')
+    chunk = ('\n'.join(lines) + '\n').encode()
+    with open(path, 'wb') as f:
+        f.write(b'# generated data for bench_datafile.py\n')
+        for _ in range(max(1, int(size // len(chunk)))):
+            f.write(chunk)
+
+def read_lines(path):
+    values, lengths = array('d'), array('q')
+    for line in open(path):
+        line = re.sub(r'#.*', "", line)
+        line = re.sub(r',', " ", line)
+        parts = line.split()
+        if not parts: continue
+        values.extend(map(float, parts))
+        lengths.append(len(parts))
+    return values, lengths
+
+def read_block(path):
+    values, lengths = array('d'), array('q')
+    for vals, lens in read_blocks(path):
+        values.extend(vals)
+        lengths.extend(lens)
+    return values, lengths
+
+fd, path = tempfile.mkstemp(suffix='.txt')
+os.close(fd)
+try:
+    print('Writing %.0f MB of data...' % megabytes, flush=True)
+    write_data(path, megabytes * 1e6)
+    size = os.path.getsize(path) / 1e6
+    print('File size %.1f MB\n' % size)
+
+    start = time.time()
+    old = read_lines(path)
+    t_old = time.time() - start
+    start = time.time()
+    new = read_block(path)
+    t_new = time.time() - start
+    assert old == new, 'the parsers disagree'
+
+    print('%d rows, %d values' % (len(new[1]), len(new[0])))
+    print('per line re.sub: %7.3f seconds %7.1f MB/s' % (t_old, size / t_old))
+    print('read_blocks:     %7.3f seconds %7.1f MB/s' % (t_new, size / t_new))
+    print('speedup:         %7.2fx' % (t_old / t_new))
+finally:
+    os.remove(path)
@@ -0,0 +1,103 @@
+"""This module reads the rows of numbers of the city-month data files
+
+The files have one row of numbers per line, separated by spaces and/or
+commas, and anything after a # is a comment. Lines with no numbers are
+skipped. The file is read in big blocks of whole lines, each block is
+cleaned with a few string operations on the whole block, and all the
+numbers of the block are converted with one map(float, ...) into an
+array of floats, so there is no work per line in Python beyond split():
+
+    from datafile import read_blocks
+
+    for values, lengths in read_blocks("data.txt"):
+        ...     # values of the rows one after another, and row lengths
+
+A value that is not a number raises a DataError saying the line and
+column where it is. Rows may have different lengths; load() can pad the
+short ones with a fill value to make a full grid.
+"""
+
+import re
+from array import array
+
+BLOCKSIZE = 1 << 22     # characters read at a time (plus the end of the line)
+
+class DataError(ValueError):
+    r"""A value in a data file that is not a number, and where it is."""
+
+    def __init__(self, text, line, column):
+        super().__init__("could not convert string to float: %r at line %d, column %d"
+                         % (text, line, column))
+        self.text = text
+        self.line = line
+        self.column = column
+
+# find the first bad value of some lines, lineno is the number of the first
+# line; positions are the same in the cleaned lines as in the file
+def _bad_value(lines, lineno):
+    for n, line in enumerate(lines, lineno):
+        for m in re.finditer(r'\S+', line):
+            try:
+                float(m.group())
+            except ValueError:
+                return DataError(m.group(), n, m.start() + 1)
+    return ValueError('bad value in lines %d to %d' % (lineno, lineno + len(lines) - 1))
+
+# parse a string of whole lines to an array of all the values and an array
+# of the length of each row, lineno is the number of the first line
+def parse_block(text, lineno=1):
+    text = text.replace(',', ' ')               # allow comma separators
+    lines = text.split('\n')
+    if '#' in text:                             # strip comments
+        lines = [ line.partition('#')[0] for line in lines ]
+        text = '\n'.join(lines)
+    try:
+        values = array('d', map(float, text.split()))
+    except ValueError:
+        raise _bad_value(lines, lineno) from None
+    # count the values on each line, ignoring lines with no data; the
+    # split lists are dropped straight away, as keeping millions of small
+    # lists alive makes the garbage collector slow everything down
+    lengths = array('q', filter(None, map(len, map(str.split, lines))))
+    return values, lengths
+
+# read a file (path or open text file) a block at a time, yielding
+# (values, lengths) for the rows of each block
+def read_blocks(f, blocksize=BLOCKSIZE):
+    if isinstance(f, str):
+        with open(f) as fh:
+            yield from read_blocks(fh, blocksize)
+        return
+    lineno = 1
+    while True:
+        text = f.read(blocksize)
+        if not text: break
+        if not text.endswith('\n'):
+            text += f.readline()                # finish the last line
+        yield parse_block(text, lineno)
+        lineno += text.count('\n')
+
+# read a whole file to (values, lengths), and if fill is given pad
+# every row to ncols values (default the longest row) with fill
+def load(f, fill=None, ncols=None, blocksize=BLOCKSIZE):
+    values, lengths = array('d'), array('q')
+    for vals, lens in read_blocks(f, blocksize):
+        values.extend(vals)
+        lengths.extend(lens)
+    if fill is not None:
+        values, lengths = pad_rows(values, lengths, fill, ncols)
+    return values, lengths
+
+# pad ragged rows to ncols values (default the longest row) with fill,
+# rows longer than ncols are an error
+def pad_rows(values, lengths, fill, ncols=None):
+    if ncols is None:
+        ncols = max(lengths, default=0)
+    if any(n > ncols for n in lengths):
+        raise ValueError('a row has more than %d values' % ncols)
+    out = array('d', [ fill ]) * (ncols * len(lengths))
+    start = 0
+    for r, n in enumerate(lengths):
+        out[r*ncols : r*ncols + n] = values[start:start + n]
+        start += n
+    return out, array('q', [ ncols ]) * len(lengths)
@@ -0,0 +1,119 @@
+"""This module provides a masked grid of monthly values for many cities
+
+It uses the Stats of 06_01/aggregate.py, so the script importing it
+puts that directory on sys.path first, as main.py does.
+"""
+
+from array import array
+from itertools import compress, chain
+
+from aggregate import Stats, GroupStats
+
+class MonthGrid:
+    r"""
+    Grid of monthly values with one row per city, for city and season stats.
+
+    Rows are added one at a time and may have different lengths. The
+    values are kept packed in one array of floats, one row after another,
+    so a grid of millions of cities uses 8 bytes per value:
+
+        from grid import MonthGrid
+
+        grid = MonthGrid(-9, 99)
+        for row in rows:
+            grid.add_row(row)
+        for city, st in grid.row_stats().items():
+            print(city, st.avg, st.min, st.max)
+
+    Values outside the range minv to maxv are outliers and are masked out
+    of all the stats, as are the missing months at the end of short rows.
+    The stats are worked out a whole row or season at a time with
+    builtins over the masked values, and give exactly the same results
+    as adding the good values to Stats one at a time in row order.
+    """
+
+    def __init__(self, minv, maxv):
+        r"""Make an empty grid where values from minv to maxv are good."""
+        self.minv = minv
+        self.maxv = maxv
+        self.ncols = 0          # most values in any row
+        self._vals = array('d') # all the rows one after another
+        self._ends = array('q') # end offset of each row in _vals
+        self._dense = None      # padded grid and mask, made when needed
+
+    @property
+    def nrows(self):
+        r"""The number of rows in the grid."""
+        return len(self._ends)
+
+    def add_row(self, row):
+        r"""Add a row of values for the next city."""
+        start = len(self._vals)
+        self._vals.extend(row)
+        self._ends.append(len(self._vals))
+        self.ncols = max(self.ncols, len(self._vals) - start)
+        self._dense = None
+
+    def add_rows(self, values, lengths):
+        r"""Add many rows at once, as all their values and the row lengths."""
+        end = len(self._vals)
+        self._vals.extend(values)
+        for n in lengths:
+            end += n
+            self._ends.append(end)
+        self.ncols = max(self.ncols, max(lengths, default=0))
+        self._dense = None
+
+    def _grid(self):
+        # get the grid padded to ncols with NaN in every row, and a mask of
+        # the good values, 1 for good or 0 for an outlier or NaN padding
+        if self._dense is None:
+            nc = self.ncols
+            vals = self._vals
+            if len(vals) != nc * self.nrows:    # pad the short rows
+                vals = array('d', [ float('nan') ]) * (nc * self.nrows)
+                start = 0
+                for r, end in enumerate(self._ends):
+                    vals[r*nc : r*nc + end - start] = self._vals[start:end]
+                    start = end
+            minv, maxv = self.minv, self.maxv
+            mask = bytearray(minv <= v <= maxv for v in vals)
+            self._dense = vals, mask
+        return self._dense
+
+    def outliers(self):
+        r"""Count the values given that are outside the good range."""
+        minv, maxv = self.minv, self.maxv
+        # NaN is neither good nor an outlier, and the padding is not counted
+        return sum(1 for v in self._vals if v < minv or v > maxv)
+
+    def row_stats(self):
+        r"""Get GroupStats keyed on row number of the rows with good values."""
+        vals, mask = self._grid()
+        nc = self.ncols
+        rows = GroupStats()
+        for r in range(self.nrows):
+            good = list(compress(vals[r*nc : (r+1)*nc], mask[r*nc : (r+1)*nc]))
+            if good:
+                rows[r] = Stats.of(good)
+        return rows
+
+    def season_stats(self, mps):
+        r"""
+        Get GroupStats keyed on season number of the seasons with good values.
+
+        Each season is a block of mps consecutive months (columns), and
+        the seasons are in order. Values are taken in row order.
+        """
+        vals, mask = self._grid()
+        nc = self.ncols
+        seasons = GroupStats()
+        for s in range(-(-nc // mps)):
+            months = range(s * mps, min((s+1) * mps, nc))
+            # interleave the month columns to get the block in row order
+            block = chain.from_iterable(zip(*[ vals[m::nc] for m in months ]))
+            keep = chain.from_iterable(zip(*[ mask[m::nc] for m in months ]))
+            good = list(compress(block, keep))
+            if good:
+                seasons[s] = Stats.of(good)
+        return seasons
@@ -1,8 +1,14 @@
 #!/usr/bin/python3
 
-import sys, re
+import os, sys
 from math import ceil
 
+# grid.py uses the shared modules that live with the 06_01 assignment
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '06_01'))
+
+from grid import MonthGrid   # masked grid of values for city and season stats
+from datafile import read_blocks    # rows of numbers from the data file
+
 #--- global constants ------------------------------------------------
 
 minv = -9   # min valid value (is "outlier" if outside this range)
@@ -17,14 +23,13 @@ except IndexError:
     print("Expects one argument, the data file to process")
     exit(1)
 
-data = []
+# load the file into a grid of values, rows are cities and columns are
+# months, where outliers and missing months are masked out of the stats
+grid = MonthGrid(minv, maxv)
 try:
-    for line in open(infile):
-        line = re.sub(r'#.*', "", line) # strip comments
-        line = re.sub(r',', " ", line)  # allow comma separators
-        parts = line.split()            # get separate non-space parts
-        if not parts: continue          # ignore lines with no data
-        data.append(list(map(float, parts)))    # as list of floats
+    # read in big blocks, ignoring comments, blank lines, and commas
+    for values, lengths in read_blocks(infile):
+        grid.add_rows(values, lengths)
 except ValueError as e:
     print("Bad value: "+str(e))
     exit(1)
@@ -32,26 +37,21 @@ except OSError as e:
     print(e.strerror + ": " + e.filename)
     exit(1)
 
-if not data:
+nrows = grid.nrows      # number of rows (cities) with any data at all
+if not nrows:
     print("No data at all found in file %s" % infile)
     exit(1)
 
 #--- calculations ------------------------------------------------
 
-# functions to check if value is good (valid) or bad (outlier)
-def good(v): return v >= minv and v <= maxv
-def bad(v):  return v < minv or v > maxv
-
-# function to average a non-empty numeric sequence
-def avg(seq): return sum(seq)/len(seq)
-
-# get only good data with outliers removed, tupled with row number
-goodrows = [ t for t in enumerate(
-                list(filter(good, row)) for row in data
-                ) if t[1] ]
+# stats of the good values of each row (city) and each season
+cities = grid.row_stats()
+seasons = grid.season_stats(mps)    # mps constant set at top
+ncols = grid.ncols      # most values in any row
+outliers = grid.outliers()  # count of outliers in the data
 
 # abort if there is no valid data at all
-if not goodrows:
+if not cities:
     print("No good valid data found in file %s" % infile)
     exit(1)
 
@@ -59,29 +59,19 @@ if not goodrows:
 # so there will also be at least one good season
 
 # dicts for calulated avg, min, max of each good row
-rowavgs = { i: avg(row) for (i, row) in goodrows }
-rowmins = { i: min(row) for (i, row) in goodrows }
-rowmaxs = { i: max(row) for (i, row) in goodrows }
+rowavgs = { i: st.avg for (i, st) in cities.items() }
+rowmins = { i: st.min for (i, st) in cities.items() }
+rowmaxs = { i: st.max for (i, st) in cities.items() }
 
 # number of seasons with any data at all
-snum = ceil(max(map(len, data)) / mps)
-
-# extract only the good data for each season
-seasons = []
-for s in range(snum):
-    seasons.append([])
-    for row in data:
-        vals = row[s*mps:(s+1)*mps]             # mps constant set at top
-        seasons[s].extend(filter(good, vals))   # only the good values
+snum = ceil(ncols / mps)
 
 # some (not all) seasons may be empty because there was no good data
-# make a list of the good seasons, tupled with the season number
-goodseas = [ t for t in enumerate(seasons) if t[1] ]
-
-# calc avg, min, max of each good season and store in dicts
-seaavgs = { i: avg(s) for (i, s) in goodseas }
-seamins = { i: min(s) for (i, s) in goodseas }
-seamaxs = { i: max(s) for (i, s) in goodseas }
+# calc avg, min, max of each good season in season order and store in dicts
+goodseas = [ (i, seasons[i]) for i in sorted(seasons) ]
+seaavgs = { i: st.avg for (i, st) in goodseas }
+seamins = { i: st.min for (i, st) in goodseas }
+seamaxs = { i: st.max for (i, st) in goodseas }
 
 # get good season numbers in descending order of the average
 # (we already know there will be at least one season in this order)
@@ -93,13 +83,10 @@ order = [ tup[0] for tup in sorted(seaavgs.items(),
 minavg = order[-1]  # season with the lowest average
 maxavg = order[0]   # season with the highest average
 
-# count outliers in the data
-outliers = sum(len(list(filter(bad, row))) for row in data)
-
 #--- results ------------------------------------------------
 
 print("\nCity average, min, and max:")
-for i in range(len(data)):
+for i in range(nrows):
     if i in rowavgs:
         print("City %2d: avg %5.2f, min %2d, max %2d"
                 % (i+1, rowavgs[i], rowmins[i], rowmaxs[i]))
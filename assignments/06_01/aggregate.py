@@ -0,0 +1,251 @@
+"""This module provides streaming, mergeable statistics accumulators"""
+
+# import as private attributes so objects from other modules
+# do not clutter the documentation for this one
+from itertools import repeat as _repeat
+from functools import reduce as _reduce
+from operator import add as _add
+
+class Stats:
+    r"""
+    Running count, sum, min, max and average of a stream of numbers.
+
+    Values are added one at a time with add() so the numbers never need
+    to be kept in memory. Each value may carry a payload, for example
+    the (lon, lat) location of a weather station, and the payloads of
+    the min and max values are kept as argmin and argmax:
+
+        from aggregate import Stats
+
+        st = Stats()
+        for temp, lon, lat in readings:
+            st.add(temp, (lon, lat))
+        print(st.num, st.min, st.max, st.avg, st.argmax)
+
+    When several values tie for the min or max, the first one added is
+    kept, so the result is the same as a single pass in input order.
+
+    Stats objects for separate parts of a stream can be combined with
+    merge(). Merging the parts in stream order gives the same min, max,
+    argmin, argmax and count as one pass over the whole stream.
+
+    If created with Stats(variance=True) the running mean and sum of
+    squared deviations are also tracked (Welford's method) so that the
+    var and std attributes are available. Merging combines them using
+    the parallel formula of Chan et al.
+    """
+
+    __slots__ = ('num', 'sum', 'min', 'max', 'argmin', 'argmax',
+                 '_mean', '_m2')
+
+    def __init__(self, variance=False):
+        r"""Use Stats() or Stats(variance=True) to also track variance."""
+        self.num = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        self.argmin = None
+        self.argmax = None
+        self._mean = 0.0 if variance else None
+        self._m2 = 0.0
+
+    def add(self, val, payload=None):
+        r"""Add one value, with an optional payload kept for min and max."""
+        if not self.num:
+            self.min = self.max = val
+            self.argmin = self.argmax = payload
+        elif val < self.min:
+            self.min, self.argmin = val, payload
+        elif val > self.max:
+            self.max, self.argmax = val, payload
+        self.num += 1
+        self.sum += val
+        if self._mean is not None:
+            delta = val - self._mean
+            self._mean += delta / self.num
+            self._m2 += delta * (val - self._mean)
+        return self
+
+    def merge(self, other):
+        r"""
+        Merge the Stats of a later part of the stream into this one.
+
+        The other Stats object is not changed. Merging a Stats without
+        variance into one with variance leaves the variance unknown.
+        """
+        if not other.num:
+            return self
+        if not self.num:
+            self.min, self.argmin = other.min, other.argmin
+            self.max, self.argmax = other.max, other.argmax
+        else:
+            if other.min < self.min:
+                self.min, self.argmin = other.min, other.argmin
+            if other.max > self.max:
+                self.max, self.argmax = other.max, other.argmax
+        if self._mean is not None:
+            if other._mean is None:
+                self._mean = None
+            else:
+                num = self.num + other.num
+                delta = other._mean - self._mean
+                self._m2 += other._m2 + delta * delta * self.num * other.num / num
+                self._mean += delta * other.num / num
+        self.num += other.num
+        self.sum += other.sum
+        return self
+
+    @property
+    def avg(self):
+        r"""The average of the values, or None if there are none."""
+        return self.sum / self.num if self.num else None
+
+    @property
+    def var(self):
+        r"""The population variance, or None if not tracked or no values."""
+        if self._mean is None or not self.num:
+            return None
+        return self._m2 / self.num
+
+    @property
+    def std(self):
+        r"""The population standard deviation, or None like var."""
+        var = self.var
+        return None if var is None else var ** 0.5
+
+    def dump(self):
+        r"""
+        Get the state as a list of plain values, for saving as JSON.
+
+        Payloads must also be plain values for the list to be saved
+        as JSON, and tuple payloads come back from JSON as lists.
+        """
+        return [ self.num, self.sum, self.min, self.max,
+                 self.argmin, self.argmax, self._mean, self._m2 ]
+
+    @classmethod
+    def load(cls, state):
+        r"""Make a Stats object from a list made by dump()."""
+        st = cls()
+        (st.num, st.sum, st.min, st.max,
+         st.argmin, st.argmax, st._mean, st._m2) = state
+        return st
+
+    @classmethod
+    def of(cls, vals):
+        r"""
+        Make a Stats object of a whole sequence of values at once.
+
+        This gives the same result as adding the values one at a time in
+        order with add(), without payloads, but is much faster.
+        """
+        st = cls()
+        if len(vals):
+            st.num = len(vals)
+            st.sum = _reduce(_add, vals, 0)     # added in order like add()
+            st.min = min(vals)
+            st.max = max(vals)
+        return st
+
+    def __repr__(self):
+        return 'Stats(num=%r, min=%r, max=%r, avg=%r)' % (
+                    self.num, self.min, self.max, self.avg)
+
+
+class GroupStats(dict):
+    r"""
+    Dict of Stats objects keyed on arbitrary group keys.
+
+    Memory use is one Stats object per group no matter how many values
+    are added, so any iterator of rows can be aggregated in one pass:
+
+        from aggregate import GroupStats
+
+        highs = GroupStats()
+        for row in rows:
+            highs.add(row['state'], row['maxtemp'], (row['lon'], row['lat']))
+        for state, st in highs.items():
+            print(state, st.max, st.argmax)
+
+    Groups are kept in the order their keys were first seen. Merging the
+    GroupStats of consecutive parts of a stream in order with merge()
+    therefore gives the same groups, in the same order, as one pass.
+
+    add_all() adds whole columns of keys and values at once, which is
+    faster than calling add() for each value.
+    """
+
+    def __init__(self, variance=False):
+        r"""Use GroupStats() or GroupStats(variance=True) for variance."""
+        super().__init__()
+        self.variance = variance
+
+    def add(self, key, val, payload=None):
+        r"""Add one value, with optional payload, to the group for key."""
+        st = self.get(key)
+        if st is None:
+            st = self[key] = Stats(self.variance)
+        return st.add(val, payload)
+
+    def add_all(self, keys, vals, payloads=None):
+        r"""Add values from parallel iterables of keys, values, payloads."""
+        get = self.get
+        variance = self.variance
+        if payloads is None:
+            payloads = _repeat(None)
+        for key, val, payload in zip(keys, vals, payloads):
+            st = get(key)
+            if st is None:
+                st = self[key] = Stats(variance)
+            if variance or not st.num:
+                st.add(val, payload)
+                continue
+            # same as st.add() but inline, as this is the hot loop
+            if val < st.min:
+                st.min, st.argmin = val, payload
+            elif val > st.max:
+                st.max, st.argmax = val, payload
+            st.num += 1
+            st.sum += val
+        return self
+
+    def merge(self, other):
+        r"""Merge a GroupStats of a later part of the stream into this one."""
+        for key, st in other.items():
+            if key in self:
+                self[key].merge(st)
+            else:
+                self[key] = Stats(self.variance).merge(st)
+        return self
+
+    def dump(self):
+        r"""Get the groups as a list of [key, Stats.dump()] pairs."""
+        return [ [key, st.dump()] for key, st in self.items() ]
+
+    @classmethod
+    def load(cls, groups, variance=False):
+        r"""Make a GroupStats from a list made by dump()."""
+        gs = cls(variance)
+        for key, state in groups:
+            gs[key] = Stats.load(state)
+        return gs
+
+    def __reduce__(self):
+        return (self.__class__, (self.variance,), None, None,
+                iter(self.items()))
+
+
+def group_stats(rows, key, val, payload=None, variance=False):
+    r"""
+    Aggregate any iterator of rows into a GroupStats in a single pass.
+
+    The key, val and payload arguments are functions that are given
+    each row and return its group key, numeric value and payload.
+    Rows for which val returns None are skipped.
+    """
+    groups = GroupStats(variance)
+    for row in rows:
+        v = val(row)
+        if v is not None:
+            groups.add(key(row), v, payload(row) if payload else None)
+    return groups
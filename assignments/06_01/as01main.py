@@ -1,13 +1,19 @@
 #!/usr/bin/python3
 
 import sys, re, time
-import matplotlib.pyplot as plt                             # graphing library
-from matplotlib.ticker import MultipleLocator as tick_every # tick interval object
+from multiprocessing import Pool                            # worker processes for -j
 from getopt import gnu_getopt, GetoptError                  # command line option parser
 
 # my own modules
 from tableprinter import TablePrinter           # for printing neatly formatted tables
-from csvsimple import csv_rows, csv_records     # for parsing basic CSV
+from csvsimple import (csv_rows, csv_blocks, csv_column_blocks, # for parsing basic CSV
+                       csv_ranges, csv_mmap_blocks, csv_binary_blocks)
+from colcache import load_columns, CacheWriter # cache of parsed columns
+from compressed import codec_of, open_input, open_stream    # gzip, bz2, xz, zstd input
+from ranking import Ranking                     # orderings sorted only when used
+from stateagg import (new_states, state_aggregate, state_range, # per-state aggregation
+                      merge_states, state_records, state_fields, state_update,
+                      state_snapshots)
 
 #--- global constants -----------------------------------------------
 
@@ -19,20 +25,68 @@ csv_sep = ';'   # unusual CSV field separator is ';'
 leafname = re.sub(r'^.*/', '', sys.argv[0])
 
 # usage string
-usage = """Usage: %s [ -v ] [ -d ] [ <infile> ]  [ <outfile> ]
+usage = """Usage: %s [ -v ] [ -d ] [ -j <num> ] [ -m ] [ -i <statefile> ]
+                [ -p <secs> ] [ --no-cache | --rebuild-cache ] [ --no-graphs ]
+                [ <infile> ]  [ <outfile> ]
 
     If input is not from a pipe or redirection then the first
     non-option argument will be used as the input filename.
 
+    The input, file or pipe, may be gzip, bz2, xz or zstd compressed
+    (zstd needs the zstandard module). This is found from the first
+    bytes, and the data is decompressed in a background thread while
+    it is parsed. A compressed file is always read in one stream, so
+    -j and -m are ignored, and -i cannot be used.
+
     Optional <outfile> will be used as the base name for the
     output graphs. If not given the graphs will be displayed
-    interactively instead.
+    interactively instead. When the graphs are only saved they
+    are drawn off screen in parallel worker processes.
 
     -d for "display" displays the graphs interactively even
     when you have provided an outfile for saving them on disk.
 
     -v for "verbose" causes more stats to be printed textually.
     You may need to widen your terminal window to see it all.
+
+    -j for "jobs" reads the input file in <num> parts in parallel
+    worker processes. Ignored when input is from a pipe, when the
+    file is already in the column cache, or with --rebuild-cache.
+    A file read this way is not saved in the column cache.
+
+    -m for "mmap" reads the input file through a memory map and only
+    decodes the fields that are needed. Ignored when input is from a
+    pipe. A file read this way is not saved in the column cache.
+
+    -i for "incremental" keeps the per-state aggregates in <statefile>
+    along with how much of the input file has been read, so the next
+    run only reads lines appended since. If the start of the file has
+    changed it is all read again. Needs an input file, not a pipe.
+
+    -p for "progress" writes a line to stderr every <secs> seconds
+    while reading, with the records read so far, records/second,
+    the states seen and the lowest and highest temperatures so far.
+    Useful for long running pipes. Only when the input is read in
+    one stream, so not with -j, -i, or a file loaded from the cache.
+
+    Piped input is read from stdin in binary chunks of whatever has
+    arrived (up to 4 MB) and each chunk is aggregated as it arrives,
+    so it is as fast as a file and -p keeps up with a slow pipe.
+
+    An input file (not a pipe) is parsed into columns that are cached
+    on disk, so the next run on the same unchanged file can skip the
+    parsing. The columns are written to the cache a block at a time
+    while the file is read, and a cached file only loads the columns
+    it needs, so the cache takes no more memory than reading the file.
+    See colcache.py for where the cache is and its size limit.
+
+    --no-cache neither uses nor updates the cache.
+
+    --rebuild-cache parses the file again and replaces its cache entry.
+
+    --no-graphs only prints the text results, no graphs are shown or
+    saved (so <outfile> is not needed), and the graphing library is
+    not even loaded, which makes the program start a lot faster.
 """ % leafname
 
 # display all messages given to stderr and exit neatly
@@ -44,28 +98,52 @@ def die(*msgs):
 
 # parse the options, error if invalid
 try:
-    opts, args = gnu_getopt(sys.argv[1:], 'hvd')
+    opts, args = gnu_getopt(sys.argv[1:], 'hvdj:mi:p:', ['no-cache', 'rebuild-cache', 'no-graphs'])
     opts = dict(opts)       # duplicate options do not matter, so put then in a dict for speed
     verbose = '-v' in opts
     display = '-d' in opts
+    use_mmap = '-m' in opts
+    state_file = opts.get('-i')  # incremental aggregate state file
+    use_cache = '--no-cache' not in opts
+    rebuild = '--rebuild-cache' in opts
+    no_graphs = '--no-graphs' in opts
     if '-h' in opts:        # if -h (help) option used
         print(usage)        # print the usage message
         exit()
+    jobs = int(opts.get('-j', 1))
+    if jobs < 1: raise ValueError('-j needs a number of at least 1')
+    snap_every = float(opts['-p']) if '-p' in opts else None  # progress interval
+    if snap_every is not None and snap_every <= 0:
+        raise ValueError('-p needs a number of seconds above 0')
 except GetoptError as e:
     die(e, usage)           # display usage message if options are wrong
+except ValueError as e:
+    die(e, usage)           # -j or -p number was not valid
 
 # check we can open the input
+inpath = None                   # path of input file, None if from a pipe
+codec = None                    # compression of the input file, None if plain
 if not sys.stdin.isatty():      # if input from a pipe
-    infile = sys.stdin          # then use stdin as the input file
+    infile = open_stream(sys.stdin.buffer)  # then use stdin as the input file, as bytes
 else:                           # but if no piped input, file must be the first argument
     if len(args) < 1:           # if there's no input file then die with usage message
         die('Needs an input file or piped input', usage)
     try:
-        infile  = open(args[0]) # open the first arg as a file
+        codec = codec_of(args[0])       # check for compression
+        infile  = open_input(args[0])   # open the first arg as a file
+        inpath = args[0]        # remember the path for parallel reading
         args = args[1:]         # then shift the args down so that only the outfile remains
     except OSError as e:
         die(e.strerror + (': ' + e.filename if e.filename else ''))
 
+if state_file and not inpath:
+    die('-i needs an input file, not a pipe', usage)
+if state_file and codec:
+    die('-i needs an uncompressed input file', usage)
+if codec:                       # byte offsets in a compressed file mean nothing
+    jobs = 1
+    use_mmap = False
+
 # get output path if given, path will be used as a base name for the graphs
 if len(args) == 1:
     outpath = args[0]
@@ -80,44 +158,95 @@ def lc(s): return s.lower()     # lowercase mapping function used for the field
 
 rec_count = 0                       # count of all records in the CSV file
 good_count = 0                      # count of good records in the CSV file
-data = {}                           # dict of states where each value is
-                                    #   a dict record of min, max, sum, num, avg
+aggs = new_states()                 # streaming per-state aggregates
 
 start = time.time()                 # start timing the CSV reading/parsing
-csv = csv_rows(infile, sep=csv_sep) # start the CSV row parser
-fields = list(map(lc, next(csv)))   # read lowercase field names from 1st row
+first = infile.readline()           # str from a file, bytes from a pipe
+if not inpath: first = first.decode()
+header = next(csv_rows([first], sep=csv_sep))   # parse 1st row
+fields = list(map(lc, header))      # lowercase field names from 1st row
 
 print('\nReading CSV file...', end=' ', flush=True) # flush to make it visible immediately
-for rec in csv_records(csv, fields):    # get each line of CSV parsed into a dict
-    rec_count += 1                  # count the total number of records
-    if not rec['state']: continue   # ignore data with no state (airports)
-    good_count += 1                 # count the good records we can use
-
-    state = rec['statename']        # get state name from this line record
-    if state in data:               # if state is already in our data
-        st = data[state]            # then get existing state record
-    else:                           # else
-        st = {                      # add a new state record to the data
-            'state': state,
-            'min': rec['mintemp'],
-            'max': rec['maxtemp'],
-            'sum': 0,               # to sum the averages (and later divide by the num)
-            'num': 0,               # to count the number of avg samples
-        }
-
-    # keep track of the min and max temperature for each state
-    if rec['mintemp'] < st['min']: st['min'] = rec['mintemp']
-    if rec['maxtemp'] > st['max']: st['max'] = rec['maxtemp']
-
-    # also sum and count average temperature
-    st['sum'] += rec['avgtemp'] # sum
-    st['num'] += 1              # count
-    data[state] = st    # store updated state record back into the data
-
-# finished reading CSV file, so report how long it took
-time_csv = time.time() - start
-print('took %.2f seconds' % time_csv, flush=True)
-
+use_cache = use_cache and inpath and not state_file  # only real files can be cached
+columns = None                      # the cached columns, if the file is in the cache
+if use_cache and not rebuild:
+    # only the columns needed, with the numbers memory mapped
+    columns = load_columns(inpath, use_mmap=True,
+                           fields=[ f for f in header if lc(f) in state_fields ])
+fill_cache = use_cache and columns is None and (jobs == 1 or rebuild) and not use_mmap
+if fill_cache:
+    jobs = 1                        # read in one stream to write the cache
+
+if state_file:
+    # read only what was appended since the last run into the saved state
+    with open(inpath, 'rb') as f: header_len = len(f.readline())
+    aggs, rec_count, good_count, new_count, status = state_update(
+            inpath, state_file, csv_sep, fields, header_len, use_mmap)
+    time_csv = time.time() - start
+    print('took %.2f seconds' % time_csv, flush=True)
+    print('    read {:,} '.format(new_count) + {
+            'appended': 'new records appended since the last run',
+            'new': 'records, there was no state file yet',
+            'changed': 'records, the file changed so it was all read again',
+            'broken': 'records, the state file was broken so it was all read again',
+        }[status])
+elif columns is not None:
+    # aggregate the cached columns as one big block, keyed on lowercase field names
+    if columns:
+        rec_count, good_count = state_aggregate(
+                [ { lc(f): col for f, col in columns.items() } ], aggs)
+
+    time_csv = time.time() - start
+    print('took %.2f seconds' % time_csv, flush=True)
+    print('    loaded from the column cache')
+elif inpath and jobs > 1:
+    # split the file after the header line into byte ranges at line starts,
+    # aggregate each range in a worker, then merge the partial results in
+    # file order so the states are in the same order as a serial read
+    with open(inpath, 'rb') as f: header_len = len(f.readline())
+    ranges = csv_ranges(inpath, jobs, header_len)
+    with Pool(len(ranges)) as pool:
+        parts = pool.starmap(state_range,
+            [ (inpath, a, b, csv_sep, fields, use_mmap) for (a, b) in ranges ])
+    time_work = time.time() - start
+    merge = time.time()
+    for recs, good, part, took in parts:
+        rec_count += recs
+        good_count += good
+        merge_states(aggs, part)
+    time_merge = time.time() - merge
+    time_csv = time.time() - start
+    print('took %.2f seconds' % time_csv, flush=True)
+    for i, (recs, good, part, took) in enumerate(parts):
+        print('    worker {} read {:,} records in {:.2f} seconds'.format(
+                                                        i+1, recs, took))
+    print('    all workers took %.2f seconds, merging took %.4f seconds'
+                                                % (time_work, time_merge))
+else:
+    # parse big blocks of the CSV into columns so no per-row dicts are made
+    if inpath and use_mmap:         # only the needed fields of a real file
+        blocks = csv_mmap_blocks(inpath, state_fields, csv_sep, fields)
+    elif fill_cache:
+        # write the blocks to the cache under the header names as they go past
+        cache = CacheWriter(inpath)
+        blocks = cache.tee(csv_column_blocks(csv_blocks(infile), csv_sep, header))
+        blocks = ({ lc(f): col for f, col in cols.items() } for cols in blocks)
+    elif inpath:
+        blocks = csv_column_blocks(csv_blocks(infile), csv_sep, fields)
+    else:                           # a pipe, aggregated a chunk at a time as it comes
+        blocks = csv_column_blocks(csv_binary_blocks(infile), csv_sep, fields)
+    if snap_every: print(file=sys.stderr)   # start the progress lines on a new line
+    snapshot = state_snapshots(snap_every) if snap_every else None
+    rec_count, good_count = state_aggregate(blocks, aggs, snapshot)
+
+    # finished reading CSV file, so report how long it took
+    time_csv = time.time() - start
+    print('took %.2f seconds' % time_csv, flush=True)
+    if fill_cache and cache.stored:
+        print('    saved to the column cache')
+
+# dict of states where each value is a dict record of min, max, sum, num, avg
+data = state_records(aggs)
 if not data: die('No data at all found in the input')
 
 # report what we found in the CSV file
@@ -145,19 +274,12 @@ for st in data.values():
 for st in data.values():
     st['range'] = st['max'] - st['min']
 
-# get the records sorted in various different orders
-st_asc   = sorted(data.values(), key=lambda rec: rec['state'])
-max_asc  = sorted(data.values(), key=lambda rec: rec['max'])
-max_desc = sorted(data.values(), key=lambda rec: rec['max'], reverse=True)
-min_asc  = sorted(data.values(), key=lambda rec: rec['min'])
-avg_asc  = sorted(data.values(), key=lambda rec: rec['avg'])
-rng_asc  = sorted(data.values(), key=lambda rec: rec['range'])
-rng_desc = sorted(data.values(), key=lambda rec: rec['range'], reverse=True)
-# I did not use all these orders in the end
+# rank the records, each ordering is only sorted when it is first used
+rank = Ranking(data.values())
 
 # get some overall stats (min, max, avg of all)
-max_of_max = max_desc[0]['max']
-min_of_min = min_asc[0]['min']
+max_of_max = max(st['max'] for st in data.values())
+min_of_min = min(st['min'] for st in data.values())
 avg_of_avg = sum(st['avg'] for st in data.values()) / len(data)
 
 # report how long all the calculations took
@@ -176,27 +298,27 @@ tp.forms({ f: '.2f' for f in ('min', 'max', 'avg', 'range') })
 if verbose:
     tp.indent('  ').sep('  ').parts(3) # in 3 parts
     print('\nAll states by max temperature:\n')
-    tp.fields(['state', 'max']).print(max_desc)
+    tp.fields(['state', 'max']).print(rank.desc('max'))
 
     print('\nAll states by min temperature:\n')
     tp.sep(' ') # closer parts using one space
-    tp.fields(['state', 'min']).print(min_asc)
+    tp.fields(['state', 'min']).print(rank.asc('min'))
 
     print('\nAll states by avg temperature:\n')
     tp.sep('  ') # back to two spaces
-    tp.fields(['state', 'avg']).print(avg_asc)
+    tp.fields(['state', 'avg']).print(rank.asc('avg'))
 
     tp.parts(2) # in two parts because the table is wider
     print('\nAll states by temperature range (biggest first):\n')
-    tp.fields(['state', 'min', 'max', 'range']).print(rng_desc)
+    tp.fields(['state', 'min', 'max', 'range']).print(rank.desc('range'))
 
 # regardless of verbose option print the tables requested by the assignment
 tp.indent('    ').parts(2)  # in two parts
 print('\nTen highest max temperature states:\n')
-tp.fields(['state', 'max']).print(max_desc[:10])
+tp.fields(['state', 'max']).print(rank.top(10, 'max'))
 
 print('\nTen lowest min temperature states:\n')
-tp.fields(['state', 'min']).print(min_asc[:10])
+tp.fields(['state', 'min']).print(rank.bottom(10, 'min'))
 
 if verbose:
     print('\nExtra statistics were printed, so you may need to scroll up to see.')
@@ -205,53 +327,46 @@ print()
 
 #--- graphs -------------------------------------------------
 
-# four graphs are similar, so put it all in a function that we call 4 times
-# args: data is the list of records to use
-#       sort is a string describing the sort order which is used as part of the file name
-#       title is the title for the graph
-def state_graph(data, sort, title):
-    # create the "figure" with the size in inches and the resolution in dpi (dots per inch)
-    fig = plt.figure(figsize=(12,6), dpi=100)
-    # create the graph (axes object) within the figure using these margin sizes
-    ax = fig.add_axes((0.05, 0.21, 0.92, 0.73)) # (left, bottom, width, height)
-    ax.set_title(title)
-    ax.bar([ rec['state'] for rec in data ],    # plot bars of states
-            [ rec['max'] for rec in data ],     # against the max temp
-            label='max', color='red')           # red bars, "max" in legend
-    ax.bar([ rec['state'] for rec in data ],    # plot bars of states
-            [ rec['min'] for rec in data ],     # against min temp
-            label='min', color='blue')          # blue bars, "min" in legend
-    ax.plot([ rec['state'] for rec in data ],   # plot diamons for states
-            [ rec['avg'] for rec in data ],     # against the average temp
-            # use avg in the legend, light green, diamonds, with no linestyle (ls)
-            label='avg', color='lightgreen', ls='', marker='D', markersize=6)
-    # put the state names at angle -90 in a small font
-    ax.tick_params(axis='x', labelsize='small', rotation=-90)
-    # limit the x scale so that the bars fill the available space neatly
-    ax.set_xlim(-0.5, len(data)-0.5)
-    # change the rotation and label of the y axis
-    ax.set_ylabel('Celsius', rotation=-90)
-    # default tick spacing too big so set it every 10 degrees celsius
-    ax.yaxis.set_major_locator(tick_every(10))
-    # turn on the grid as a dotted line
-    ax.grid(linestyle=':')
-    # place the legend in the upper center with a drop shadow
-    ax.legend(loc='upper center', shadow=True)
-    # the graph will be shown on screen interactively if no output path given
-    # or if the -d display option was used
-    if display or not outpath:
-        plt.show()
-    # if there is an outpath then save the graph, and say where it is being saved
-    if outpath:
-        filename = outpath + '_' + sort + '.png'
-        print('Saving graph "' + title + '" to ' + filename)
-        fig.savefig(filename)
+# stop here if no graphs are wanted, without loading the graphing library
+if no_graphs:
+    print('Finished')
+    exit()
+
+# the graphing library is slow to load, so it is only imported when needed
+from stategraph import StateGraph, render_all   # bar graphs of the states
+
+# four graphs are similar, the same states in different orders
+# each is a (data, sort, title): data is the list of records to use,
+#   sort is a string describing the sort order which is used as part of
+#   the file name, and title is the title for the graph
 
 # graph title reminds us how many states were in this data set
 title = 'Temperatures for %d states - sorted by ' % len(data)
 
-state_graph(max_asc, 'max', title + 'max')      # sorted by max
-state_graph(min_asc, 'min', title + 'min')      # sorted by min
-state_graph(avg_asc, 'avg', title + 'avg')      # sorted by avg
-state_graph(rng_asc, 'rng', title + 'range')    # sorted by range
+graphs = [ (rank.asc('max'), 'max', title + 'max'),       # sorted by max
+           (rank.asc('min'), 'min', title + 'min'),       # sorted by min
+           (rank.asc('avg'), 'avg', title + 'avg'),       # sorted by avg
+           (rank.asc('range'), 'rng', title + 'range') ]  # sorted by range
+
+def graph_file(sort): return outpath + '_' + sort + '.png'
+
+if display or not outpath:
+    # the graphs will be shown on screen interactively one at a time if no
+    # output path given or if the -d display option was used
+    import matplotlib.pyplot as plt                 # interactive graphing library
+    for recs, sort, title in graphs:
+        start = time.time()
+        graph = StateGraph(len(recs), plt.figure(figsize=(12,6), dpi=100))
+        graph.update(recs, title)
+        # if there is an outpath then save the graph too, and say where it is saved
+        if outpath:
+            graph.save(graph_file(sort))
+            print('Saved graph "%s" to %s in %.2f seconds'
+                    % (title, graph_file(sort), time.time() - start))
+        plt.show()
+else:
+    # only saving, so draw them off screen in worker processes
+    renders = [ (recs, title, graph_file(sort)) for recs, sort, title in graphs ]
+    for (recs, title, filename), took in zip(renders, render_all(renders)):
+        print('Saved graph "%s" to %s in %.2f seconds' % (title, filename, took))
 print('Finished')
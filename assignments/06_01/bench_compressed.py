@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+r"""
+Benchmark reading compressed weather CSV files against the plain file.
+
+Writes a synthetic weather CSV file, compresses it with each codec
+(gzip, bz2, xz, and zstd if the zstandard module is installed), and
+times the same ingest as as01main.py's serial path, state aggregates of
+column blocks, on the plain file and on each compressed file with the
+decompression in a background thread and in the same thread.
+
+The thread can only help when there is a spare core, see the count of
+usable cores printed first.
+
+Usage: bench_compressed.py [ <rows> ] [ <stations> ]
+"""
+
+import sys, time, os, tempfile, gzip, bz2, lzma
+
+from csvsimple import csv_rows, csv_blocks, csv_column_blocks
+from compressed import open_input, zstandard
+from stateagg import new_states, state_aggregate
+from weathergen import write_csv
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+stations = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+# time a function over a few runs and return the best time
+def best_of(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        func()
+        took = time.time() - start
+        best = took if best is None else min(best, took)
+    return best
+
+def ingest(path, threaded=True):
+    with open_input(path, threaded=threaded) as f:
+        fields = [ h.lower() for h in next(csv_rows([ f.readline() ], ';')) ]
+        blocks = csv_column_blocks(csv_blocks(f), ';', fields)
+        return state_aggregate(blocks, new_states())
+
+# compress the file at path with each codec, returns (codec, path) pairs
+def compress_all(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    codecs = [ ('gzip', '.gz', gzip.compress), ('bz2', '.bz2', bz2.compress),
+               ('xz', '.xz', lzma.compress) ]
+    if zstandard is not None:
+        codecs.append(('zstd', '.zst', zstandard.ZstdCompressor().compress))
+    out = []
+    for codec, ext, compress in codecs:
+        with open(path + ext, 'wb') as f:
+            f.write(compress(data))
+        out.append((codec, path + ext))
+    return out
+
+fd, path = tempfile.mkstemp(suffix='.csv')
+os.close(fd)
+made = [ path ]
+try:
+    print('Usable cores: %d' % len(os.sched_getaffinity(0)))
+    print('Writing %d rows for %d stations...' % (rows, stations), flush=True)
+    write_csv(path, rows, stations)
+    size = os.path.getsize(path) / 1e6
+    print('File size %.1f MB' % size)
+    print('Compressing...', flush=True)
+    files = compress_all(path)
+    made += [ p for codec, p in files ]
+    if zstandard is None:
+        print('(zstd skipped, the zstandard module is not installed)')
+    print()
+
+    expect = ingest(path)
+    t_plain = best_of(lambda: ingest(path))
+    print('%-18s %8s %9s %9s %9s' % ('codec', 'MB', 'seconds', 'MB/s', 'vs plain'))
+    print('%-18s %8.1f %9.3f %9.1f %8.2fx' % ('plain', size, t_plain, size / t_plain, 1))
+    for codec, p in files:
+        assert ingest(p) == expect, codec + ' gave different counts'
+        csize = os.path.getsize(p) / 1e6
+        for threaded in (True, False):
+            took = best_of(lambda: ingest(p, threaded))
+            name = codec + ('' if threaded else ' (same thread)')
+            print('%-18s %8.1f %9.3f %9.1f %8.2fx' % (name, csize, took, size / took,
+                                                    took / t_plain))
+finally:
+    for p in made:
+        os.remove(p)
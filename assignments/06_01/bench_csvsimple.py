@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+r"""
+Benchmark the csvsimple readers on a synthetic weather CSV file.
+
+Compares the row generator path csv_records(csv_rows()) with the
+columnar csv_columns() reader, both reading the same file.
+
+Usage: bench_csvsimple.py [ <rows> ] [ <stations> ]
+"""
+
+import sys, time, os, tempfile
+
+from csvsimple import csv_rows, csv_records, csv_columns
+from weathergen import write_csv
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+stations = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+# time a function over a few runs and return the best time
+def best_of(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        func()
+        took = time.time() - start
+        best = took if best is None else min(best, took)
+    return best
+
+def read_records(path):
+    with open(path) as f:
+        for rec in csv_records(csv_rows(f, sep=';')):
+            pass
+
+def read_columns(path):
+    with open(path) as f:
+        csv_columns(f, sep=';')
+
+fd, path = tempfile.mkstemp(suffix='.csv')
+os.close(fd)
+try:
+    print('Writing %d rows for %d stations...' % (rows, stations), flush=True)
+    write_csv(path, rows, stations)
+    print('File size %.1f MB\n' % (os.path.getsize(path) / 1e6))
+
+    t_rec = best_of(lambda: read_records(path))
+    t_col = best_of(lambda: read_columns(path))
+
+    print('csv_records: %7.3f seconds %10.0f rows/s' % (t_rec, rows / t_rec))
+    print('csv_columns: %7.3f seconds %10.0f rows/s' % (t_col, rows / t_col))
+    print('speedup:     %7.2fx' % (t_rec / t_col))
+finally:
+    os.remove(path)
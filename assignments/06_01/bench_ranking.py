@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+r"""
+Benchmark ranking many groups of records with full sorts and with Ranking.
+
+The records are like the per-state records of as01main.py, with random
+min, max, avg and range temperatures. Two uses are timed:
+
+    tables  only the ten highest max and ten lowest min, as printed
+            by as01main.py without -v
+    all     every ordering as01main.py uses with -v and graphs
+
+The full sort version always makes the seven sorted copies that
+as01main.py used to make.
+
+Usage: bench_ranking.py [ <groups> ]
+"""
+
+import sys, time, random
+
+from ranking import Ranking
+
+groups = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+# time a function over a few runs and return the best time
+def best_of(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.time()
+        func()
+        took = time.time() - start
+        best = took if best is None else min(best, took)
+    return best
+
+def full_sorts(data):
+    st_asc   = sorted(data, key=lambda rec: rec['state'])
+    max_asc  = sorted(data, key=lambda rec: rec['max'])
+    max_desc = sorted(data, key=lambda rec: rec['max'], reverse=True)
+    min_asc  = sorted(data, key=lambda rec: rec['min'])
+    avg_asc  = sorted(data, key=lambda rec: rec['avg'])
+    rng_asc  = sorted(data, key=lambda rec: rec['range'])
+    rng_desc = sorted(data, key=lambda rec: rec['range'], reverse=True)
+    return max_desc[:10], min_asc[:10]
+
+def ranked_tables(data):
+    rank = Ranking(data)
+    return rank.top(10, 'max'), rank.bottom(10, 'min')
+
+def ranked_all(data):
+    rank = Ranking(data)
+    for key in ('max', 'range'):
+        rank.desc(key)
+    for key in ('max', 'min', 'avg', 'range'):
+        rank.asc(key)
+    return rank.top(10, 'max'), rank.bottom(10, 'min')
+
+random.seed(1)
+data = []
+for n in range(groups):
+    lo = random.uniform(-40, 20)
+    hi = lo + random.uniform(0, 50)
+    data.append({ 'state': 'S%d' % n, 'min': round(lo, 1), 'max': round(hi, 1),
+                  'avg': (lo + hi) / 2, 'range': hi - lo })
+
+assert full_sorts(data) == ranked_tables(data) == ranked_all(data)
+
+t_full = best_of(lambda: full_sorts(data))
+t_tables = best_of(lambda: ranked_tables(data))
+t_all = best_of(lambda: ranked_all(data))
+
+print('%d groups\n' % groups)
+print('full sorts:     %7.3f seconds' % t_full)
+print('Ranking tables: %7.3f seconds %7.1fx' % (t_tables, t_full / t_tables))
+print('Ranking all:    %7.3f seconds %7.1fx' % (t_all, t_full / t_all))
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+r"""
+Benchmark the import time of the weather scripts against tracked budgets.
+
+Runs each command of startup_budget.json with python -X importtime on a
+small generated CSV file, and takes the median over a few runs of the
+total import time (the cumulative time of the top level imports). Each
+command has a budget in milliseconds, and a list of modules it must not
+import at all, such as matplotlib when no graphs are made.
+
+Exits with status 1 if any command goes over its budget or imports a
+module it should not, so it can be run as a check. The budgets are
+generous as times differ between machines; the forbidden modules are
+the exact check.
+
+Usage: bench_startup.py [ <runs> ]
+"""
+
+import sys, os, json, subprocess, tempfile
+from statistics import median
+
+from weathergen import write_csv
+
+runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+here = os.path.dirname(os.path.abspath(__file__))
+budget_file = os.path.join(here, 'startup_budget.json')
+
+# run a command under -X importtime with stdin from a file (or nothing)
+#   returns the total import time in ms and the set of modules imported
+def import_time(script, args, stdin=None):
+    cmd = [ sys.executable, '-X', 'importtime', os.path.join(here, script) ] + args
+    with open(stdin or os.devnull, 'rb') as f:
+        res = subprocess.run(cmd, stdin=f, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE, cwd=tmpdir, text=True)
+    total = 0
+    modules = set()
+    for line in res.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):    # top level, nested ones are indented
+            total += int(cumulative)
+        modules.add(name.strip().split('.')[0])
+    return total / 1000, modules
+
+with open(budget_file) as f:
+    budgets = json.load(f)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    csv_path = os.path.join(tmpdir, 'small.csv')
+    write_csv(csv_path, 1000, 100)
+    os.mkdir(os.path.join(tmpdir, 'images'))   # us_weather.py saves graphs here
+    failed = False
+    print('%-46s %9s %9s  %s' % ('command', 'median ms', 'budget ms', 'result'))
+    for name, b in budgets.items():
+        args = [ a.replace('{csv}', csv_path).replace('{tmp}', tmpdir) for a in b['args'] ]
+        stdin = csv_path if b.get('stdin') else None
+        times = []
+        found = set()
+        for _ in range(runs):
+            ms, modules = import_time(b['script'], args, stdin)
+            times.append(ms)
+            found |= modules
+        ms = median(times)
+        bad = sorted(found & set(b.get('forbidden', [])))
+        problems = [ 'over budget' ] if ms > b['budget_ms'] else []
+        if bad:
+            problems.append('imported ' + ', '.join(bad))
+        result = '; '.join(problems) or 'ok'
+        failed = failed or bool(problems)
+        print('%-46s %9.1f %9d  %s' % (name, ms, b['budget_ms'], result))
+
+exit(1 if failed else 0)
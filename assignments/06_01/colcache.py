@@ -0,0 +1,295 @@
+r"""
+On-disk binary cache of CSV files parsed into columns.
+
+A parsed file is stored as one entry directory in the cache directory
+holding a small JSON header plus one binary file per column:
+
+    header.json     source path, size, mtime, content hash, row count,
+                    and the name, kind and file of each column
+    <n>.f64         numeric column as raw native float64 (array 'd')
+    <n>.i32         quoted string column as int32 category codes, the
+                    category strings themselves are kept in the header
+    <n>.jsonl       any other column (mixed values), one JSON value a line
+
+A CacheWriter writes an entry a block of columns at a time while the
+file is read, appending each block to the column files, so caching a
+file takes no more memory than reading it. load_columns() can load just
+some of the columns, and memory map the raw float64 ones.
+
+An entry is only used if the size, mtime and content hash of the source
+file all still match, otherwise it is rebuilt. The file is only hashed
+when its size and mtime match. Writing the cache is best effort: if it
+fails (such as on a full disk) there is a warning and the run goes on.
+When the total size of the cache goes over the limit the least recently
+used entries are removed until it fits.
+
+The cache directory is $WEATHER_CACHE_DIR, or ~/.cache/weather-csv if
+that is not set. The size limit in bytes is $WEATHER_CACHE_MAX, or
+1 GB if that is not set.
+"""
+
+import os, json, shutil, hashlib, sys
+from array import array
+from mmap import mmap, ACCESS_READ
+
+default_max = 1 << 30   # default limit on total size of the cache in bytes
+version = 2             # layout of the entries, older ones are rebuilt
+
+# get the cache directory
+def cache_dir():
+    return os.environ.get('WEATHER_CACHE_DIR') or os.path.join(
+                        os.path.expanduser('~'), '.cache', 'weather-csv')
+
+# get the cache size limit in bytes
+def cache_max():
+    return int(os.environ.get('WEATHER_CACHE_MAX') or default_max)
+
+# hash the whole content of a file, reading it in big blocks
+def file_hash(path, size=1<<22):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+# make the key identifying the current version of a source file
+def file_key(path):
+    st = os.stat(path)
+    return { 'source': os.path.abspath(path), 'size': st.st_size,
+             'mtime': st.st_mtime_ns, 'hash': file_hash(path) }
+
+# get the entry directory in the cache for a source file path
+def entry_dir(path, cdir=None):
+    name = hashlib.blake2b(os.path.abspath(path).encode(),
+                           digest_size=12).hexdigest()
+    return os.path.join(cdir or cache_dir(), name)
+
+# file name extension of each kind of column file
+exts = { 'f64': 'f64', 'cat': 'i32', 'jsonl': 'jsonl' }
+
+# the kind of column file for a column block
+def col_kind(col):
+    if type(col) == array:
+        return 'f64'
+    if all(type(v) == str for v in col):
+        return 'cat'
+    return 'jsonl'
+
+class CacheWriter:
+    r"""
+    New cache entry for a source file, written a block of columns at a time.
+
+    Each block is appended to the column files as it comes, so only the
+    category strings are kept in memory. A column that turns out to
+    have mixed types in a later block is rewritten as JSON lines. The
+    entry replaces any old one for the file when finish() is called:
+
+        writer = CacheWriter(path)
+        for cols in writer.tee(blocks):     # the same blocks go through
+            ...
+        print('cached' if writer.stored else 'not cached')
+
+    Writing is best effort: the first OSError is given as a warning on
+    stderr, the unfinished entry is removed and nothing more is written.
+    """
+
+    def __init__(self, path, key=None, cdir=None):
+        r"""Start a new entry, key is file_key(path) taken before reading."""
+        self.path = path
+        self.cdir = cdir or cache_dir()
+        self.rows = 0
+        self.stored = False     # the entry has been finished and saved
+        self.failed = False     # a write failed, so nothing more is written
+        self._cols = {}         # field name -> header info of its column
+        self._cats = {}         # field name -> code of each category string
+        self._tmp = None
+        try:
+            self.key = key or file_key(path)
+            os.makedirs(self.cdir, exist_ok=True)
+            self._tmp = '%s.tmp%d' % (entry_dir(path, self.cdir), os.getpid())
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            os.mkdir(self._tmp)
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, e):
+        if not self.failed:
+            print('Warning: could not save to the column cache:', e, file=sys.stderr)
+        self.failed = True
+        self.abort()
+
+    def _file(self, info):
+        return os.path.join(self._tmp, info['file'])
+
+    def _to_jsonl(self, name):
+        # rewrite a column written so far as JSON lines
+        info = self._cols[name]
+        if info['kind'] == 'cat':
+            info['cats'] = list(self._cats.pop(name))
+        col = read_col(self._tmp, info, self.rows)
+        os.remove(self._file(info))
+        info.pop('cats', None)
+        info['kind'] = 'jsonl'
+        info['file'] = info['file'].rsplit('.', 1)[0] + '.jsonl'
+        with open(self._file(info), 'w') as f:
+            f.writelines(json.dumps(v) + '\n' for v in col)
+
+    def _append(self, name, col):
+        kind = col_kind(col)
+        info = self._cols.get(name)
+        if info is None:
+            info = self._cols[name] = { 'name': name, 'kind': kind,
+                        'file': '%d.%s' % (len(self._cols), exts[kind]) }
+            if kind == 'cat':
+                self._cats[name] = {}
+        elif kind != info['kind']:
+            if info['kind'] != 'jsonl':
+                self._to_jsonl(name)
+            kind = 'jsonl'
+        if kind == 'f64':
+            with open(self._file(info), 'ab') as f:
+                col.tofile(f)
+        elif kind == 'cat':
+            cats = self._cats[name]
+            codes = array('i', [ cats.setdefault(v, len(cats)) for v in col ])
+            with open(self._file(info), 'ab') as f:
+                codes.tofile(f)
+        else:
+            with open(self._file(info), 'a') as f:
+                f.writelines(json.dumps(v) + '\n' for v in col)
+
+    def add(self, cols):
+        r"""Append a dict of column blocks of the same length, keyed on field names."""
+        if self.failed or not cols: return
+        try:
+            for name, col in cols.items():
+                self._append(name, col)
+            self.rows += len(col)
+        except OSError as e:
+            self._fail(e)
+
+    def finish(self):
+        r"""Save the entry in place of any old one, returns whether it was saved."""
+        if self.failed: return False
+        try:
+            for name, cats in self._cats.items():
+                self._cols[name]['cats'] = list(cats)
+            header = dict(self.key)
+            header.update(version=version, byteorder=sys.byteorder, rows=self.rows,
+                          columns=list(self._cols.values()))
+            with open(os.path.join(self._tmp, 'header.json'), 'w') as f:
+                json.dump(header, f)
+            edir = entry_dir(self.path, self.cdir)
+            shutil.rmtree(edir, ignore_errors=True)
+            os.replace(self._tmp, edir)
+            self._tmp = None
+            evict(cache_max(), self.cdir)
+        except OSError as e:
+            self._fail(e)
+            return False
+        self.stored = True
+        return True
+
+    def abort(self):
+        r"""Remove the unfinished entry."""
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+    def tee(self, blocks):
+        r"""Pass column blocks through while adding them, and finish at the end."""
+        try:
+            for cols in blocks:
+                self.add(cols)
+                yield cols
+        except BaseException:
+            self.abort()
+            raise
+        self.finish()
+
+# read one column given its header info
+#   with mmap numeric columns are zero-copy memoryviews of the file
+def read_col(edir, info, nrows, use_mmap=False):
+    path = os.path.join(edir, info['file'])
+    kind = info['kind']
+    if kind == 'jsonl':
+        with open(path) as f:
+            col = list(map(json.loads, f))
+        if len(col) != nrows: raise EOFError('short column file ' + path)
+        return col
+    if kind not in ('f64', 'cat'):
+        raise ValueError('unknown column kind %r' % kind)
+    if use_mmap and kind == 'f64' and nrows:
+        with open(path, 'rb') as f:
+            col = memoryview(mmap(f.fileno(), 0, access=ACCESS_READ)).cast('d')
+        if len(col) != nrows: raise EOFError('short column file ' + path)
+        return col
+    col = array('d' if kind == 'f64' else 'i')
+    with open(path, 'rb') as f:
+        col.fromfile(f, nrows)
+    if kind == 'cat':
+        return list(map(info['cats'].__getitem__, col))
+    return col
+
+# store the whole parsed columns of a source file in the cache
+#   key is from file_key() taken before the file was parsed
+#   returns whether they were stored, with a warning on stderr if not
+def store_columns(path, columns, key=None, cdir=None):
+    writer = CacheWriter(path, key, cdir)
+    writer.add(columns)
+    return writer.finish()
+
+# load the cached columns of a source file as a dict keyed on field names
+#   returns None if there is no valid entry for the current file
+#   key can be given if file_key() was already called for the file
+#   fields if given are the names of the only columns to load, an entry
+#   for an empty file has no columns at all so gives {}
+#   use_mmap memory maps the float64 columns instead of reading them
+def load_columns(path, key=None, cdir=None, use_mmap=False, fields=None):
+    edir = entry_dir(path, cdir)
+    try:
+        with open(os.path.join(edir, 'header.json')) as f:
+            header = json.load(f)
+        if header.get('version') != version or header.get('byteorder') != sys.byteorder:
+            return None
+        if key is None:
+            # only hash the file if its size and mtime still match
+            st = os.stat(path)
+            if (header.get('size'), header.get('mtime')) != (st.st_size, st.st_mtime_ns):
+                return None
+            key = file_key(path)
+        if any(header.get(k) != v for k, v in key.items()):
+            return None
+        infos = { info['name']: info for info in header['columns'] }
+        if not header['rows']:
+            return {}
+        if fields is not None:
+            infos = { name: infos[name] for name in fields }
+        columns = { name: read_col(edir, info, header['rows'], use_mmap)
+                    for name, info in infos.items() }
+        os.utime(os.path.join(edir, 'header.json'))     # mark as recently used
+    except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return columns
+
+# get the total size in bytes of all files in a directory
+def dir_size(path):
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+# remove least recently used entries until the cache is within the limit
+def evict(limit, cdir=None):
+    cdir = cdir or cache_dir()
+    entries = []
+    for e in os.scandir(cdir):
+        if not e.is_dir() or '.tmp' in e.name: continue    # skip entries being written
+        try:
+            used = os.stat(os.path.join(e.path, 'header.json')).st_mtime
+        except OSError:
+            used = 0    # unfinished or broken entries go first
+        entries.append((used, dir_size(e.path), e.path))
+    total = sum(size for used, size, p in entries)
+    for used, size, path in sorted(entries):
+        if total <= limit: break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+    return total
@@ -0,0 +1,234 @@
+r"""
+Reading of compressed weather CSV files as if they were plain text.
+
+The compression format is found from the magic bytes at the start of the
+data, not from the file name:
+
+    gzip    1f 8b               zlib module
+    bz2     'BZh'               bz2 module
+    xz      fd '7zXZ' 00        lzma module
+    zstd    28 b5 2f fd         zstandard module, if it is installed
+
+Anything else is read as it is. The data is decompressed in a background
+thread a piece at a time, into a short queue that the reader takes the
+pieces from, so decompression overlaps with parsing. The zlib, bz2 and
+lzma decompressors let go of the GIL while they work, and each piece is
+made by one call of the decompressor, so this really does run on two
+cores:
+
+    from compressed import open_input
+
+    with open_input('weather.csv.gz') as f:     # text, like open()
+        for block in csv_blocks(f):
+            ...
+
+open_stream() does the same for an already open binary stream such as
+sys.stdin.buffer, and codec_of() tells if a file is compressed.
+"""
+
+import io, bz2, lzma, zlib, queue, threading
+
+try:
+    import zstandard                # optional, only needed for zstd files
+except ImportError:
+    zstandard = None
+
+# magic bytes that start the data of each compression format
+magic = [ (b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'),
+          (b'\xfd7zXZ\x00', 'xz'), (b'\x28\xb5\x2f\xfd', 'zstd') ]
+magic_len = max(len(m) for m, codec in magic)
+
+# get the compression format from the first bytes of the data, or None
+def detect(head):
+    for m, codec in magic:
+        if head.startswith(m): return codec
+    return None
+
+# get the compression format of a file, or None if it is not compressed
+def codec_of(path):
+    with open(path, 'rb') as f:
+        return detect(f.read(magic_len))
+
+# make a new decompressor object for each format the stdlib can do
+decompressors = {
+    'gzip': lambda: zlib.decompressobj(wbits=31),   # with the gzip header
+    'bz2': bz2.BZ2Decompressor,
+    'xz': lambda: lzma.LZMADecompressor(lzma.FORMAT_XZ),
+}
+
+# generator of the decompressed data of the binary file object f
+#   each piece of at most size bytes comes from one call of the
+#   decompressor, which lets go of the GIL for all of it, so another
+#   thread can parse at the same time; concatenated streams (such as
+#   multi-member gzip files) are all read
+def decompress_pieces(codec, f, size=1<<20):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise OSError('zstd compressed input needs the zstandard module')
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        yield from iter(lambda: reader.read(size), b'')
+        return
+    if codec not in decompressors:
+        raise ValueError('unknown compression format: %r' % codec)
+    new = decompressors[codec]
+    zl = codec == 'gzip'        # zlib keeps unused input itself, the others take it all
+    d = new()
+    data = b''                  # input not yet given to the decompressor
+    pending = False             # a stream has started but not ended
+    while True:
+        if not data and (zl or d.needs_input):
+            data = f.read(size)
+            if not data: break
+        pending = True
+        out = d.decompress(data, size)
+        data = d.unconsumed_tail if zl else b''
+        if d.eof:               # the next stream may follow straight on
+            data = d.unused_data
+            d = new()
+            pending = False
+        if out: yield out
+    if zl:
+        out = d.flush()
+        if out: yield out
+    if pending:
+        raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+
+class PieceReader(io.RawIOBase):
+    r"""
+    Raw binary stream of the pieces of bytes from an iterator.
+
+    The files in close are closed with the stream.
+    """
+
+    def __init__(self, pieces, close=()):
+        self._pieces = iter(pieces)
+        self._close = tuple(close)
+        self._buf = memoryview(b'')
+        self._eof = False
+
+    def _next(self):
+        return next(self._pieces, b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buf:
+            if self._eof: return 0
+            piece = self._next()
+            if not piece:
+                self._eof = True
+                return 0
+            self._buf = memoryview(piece)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            for f in self._close:
+                f.close()
+        super().close()
+
+class ThreadedReader(PieceReader):
+    r"""
+    Raw binary stream of the pieces of bytes made by an iterator in a thread.
+
+    The thread takes pieces from the iterator into a queue of at most
+    depth pieces, so it stays a little ahead of the reader. An exception
+    in the thread is raised again in the reader.
+    """
+
+    def __init__(self, pieces, depth=8, close=()):
+        super().__init__((), close)
+        self._queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(pieces,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # wait for room in the queue, unless the reader has closed
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, pieces):
+        try:
+            for piece in pieces:
+                if not self._put(piece): return
+            self._put(b'')
+        except BaseException as e:
+            self._put(e)
+
+    def _next(self):
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            self._eof = True
+            raise item
+        return item
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+class _Prefixed(io.RawIOBase):
+    # raw stream of some bytes already read from f followed by the rest of f
+
+    def __init__(self, head, f):
+        self._head = head
+        self._f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        return self._f.readinto(b)
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+# open a binary file object f (such as sys.stdin.buffer) that may hold
+#   compressed data, give mode 'rb' for bytes, or 'r' for text
+#   compressed data is decompressed in a thread unless threaded is False
+def open_stream(f, mode='rb', encoding='utf-8', newline=None, threaded=True,
+                chunk=1<<20):
+    head = f.peek(magic_len)[:magic_len] if hasattr(f, 'peek') else b''
+    if len(head) < magic_len:
+        # a pipe may not have enough ready to look at, so read what is needed
+        head = f.read(magic_len)
+        f = io.BufferedReader(_Prefixed(head, f), chunk)
+    codec = detect(head)
+    if codec:
+        pieces = decompress_pieces(codec, f, chunk)
+        if threaded:
+            raw = ThreadedReader(pieces, close=(f,))
+        else:
+            raw = PieceReader(pieces, close=(f,))
+        f = io.BufferedReader(raw, chunk)
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding=encoding, newline=newline)
+
+# open a file that may be compressed, like open() for reading
+#   mode is 'r' for text or 'rb' for bytes, plain files are opened as usual
+def open_input(path, mode='r', encoding='utf-8', newline=None, threaded=True,
+               chunk=1<<20):
+    if codec_of(path) is None:
+        if 'b' in mode:
+            return open(path, 'rb')
+        return open(path, mode, encoding=encoding, newline=newline)
+    return open_stream(open(path, 'rb'), mode, encoding, newline, threaded, chunk)
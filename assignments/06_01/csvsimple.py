@@ -13,8 +13,25 @@ When reading:
 When writing:
     String values are quoted even if they contain numbers.
     Float and int types are written unquoted.
+
+Columnar reading:
+    csv_columns() returns one list-like column per field instead of
+    one record per row. Columns where every value is an unquoted number
+    are returned as array('d') (packed float64). Columns where every
+    value is quoted are returned as lists of interned strings, so equal
+    values share one str object. Any other column is a list of values
+    converted exactly as csv_rows() would convert them.
+
+    csv_mmap_blocks() reads a real file through a memory map and only
+    decodes and converts the fields that are asked for by name.
 """
 
+import re
+from sys import intern
+from mmap import mmap, ACCESS_READ
+from array import array
+from itertools import zip_longest, repeat
+
 # convert CSV field to Python value
 def field2val(field):
     if field[:1] == '"':
@@ -45,6 +62,183 @@ def csv_records(rows, fields=None):
     # combine each row into a dict keyed on field names
     for row in rows: yield dict(zip(fields,row))
 
+# generator function to read a text file in big blocks
+#   each block ends at a line boundary so no line is split between blocks
+def csv_blocks(infile, size=1<<20):
+    rest = ''
+    while True:
+        block = infile.read(size)
+        if not block: break
+        block = rest + block
+        end = block.rfind('\n') + 1
+        rest = block[end:]
+        if end: yield block[:end]
+    if rest: yield rest
+
+# split the bytes of a file from start to the end into num ranges
+#   each range is a (start, end) tuple of byte offsets that begins at a
+#   line start, so ranges can be parsed independently of each other
+def csv_ranges(path, num, start=0):
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        bounds = [ start ]
+        for i in range(1, num):
+            pos = max(bounds[-1], start + (size - start) * i // num)
+            if pos > start:             # move forward to the next line start
+                f.seek(pos - 1)
+                pos += len(f.readline()) - 1
+            bounds.append(min(pos, size))
+        bounds.append(size)
+    return [ (a, b) for a, b in zip(bounds, bounds[1:]) if a < b ]
+
+# generator function to read a byte range of a file in big text blocks
+#   like csv_blocks() each block ends at a line boundary
+def csv_range_blocks(path, start, end, size=1<<20, encoding='utf-8'):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        rest = b''
+        while start < end:
+            block = rest + f.read(min(size, end - start))
+            if len(block) == len(rest): break
+            start += len(block) - len(rest)
+            cut = block.rfind(b'\n') + 1
+            rest = block[cut:]
+            if cut: yield block[:cut].decode(encoding)
+        if rest: yield rest.decode(encoding)
+
+# generator function to read a binary file (such as sys.stdin.buffer) in
+#   blocks decoded to text, like csv_blocks() each block ends at a line
+#   boundary, but there is no text layer decoding and translating newlines
+#   a little at a time, and a block can never split a UTF-8 character
+#   with read1() a pipe gives whatever has arrived, up to size bytes, so
+#   each block is passed on as soon as it comes instead of waiting to fill
+def csv_binary_blocks(infile, size=1<<22, encoding='utf-8'):
+    read = getattr(infile, 'read1', infile.read)
+    rest = b''
+    while True:
+        block = read(size)
+        if not block: break
+        block = rest + block
+        cut = block.rfind(b'\n') + 1
+        rest = block[cut:]
+        if cut: yield block[:cut].decode(encoding)
+    if rest: yield rest.decode(encoding)
+
+# convert a sequence of CSV field strings into a typed column
+def fields2col(fields):
+    try:
+        return array('d', map(float, fields))   # all unquoted numbers
+    except ValueError:
+        pass
+    # fields cannot contain quotes, so every field is quoted if and only if
+    # the joined fields start and end with quotes and have 2 per field
+    joined = '\n'.join(fields)
+    if (joined[:1] == '"' == joined[-1:] and joined.count('"') == 2*len(fields)
+            and joined.count('"\n"') == len(fields) - 1):
+        return list(map(intern, joined.replace('"', '').split('\n')))
+    return [ field2val(f) for f in fields ]     # mixed, convert one by one
+
+# append one column onto another, falling back to a list if types differ
+def extend_col(col, more):
+    if type(col) != type(more) and type(col) == array:
+        col = col.tolist()
+    col.extend(more)
+    return col
+
+# split lines of CSV text into a list of field string sequences, one per field
+def lines2fields(lines, sep, nf):
+    # when every line has the same number of fields the whole lot can be
+    # split at once and each field taken as a slice of the flat list
+    if list(map(str.count, lines, repeat(sep))).count(nf-1) == len(lines):
+        flat = sep.join(lines).split(sep)
+        return [ flat[i::nf] for i in range(nf) ]
+    rows = [ line.split(sep) for line in lines ]
+    cols = list(zip_longest(*rows, fillvalue=''))
+    return cols + [ ('',) * len(rows) ] * (nf - len(cols))
+
+# generator function to parse blocks of CSV text into dicts of columns
+#   yields one dict per block, mapping field name to a column for that block
+def csv_column_blocks(blocks, sep=",", fields=None):
+    for block in blocks:
+        lines = list(filter(None, map(str.strip, block.split('\n'))))
+        if not fields and lines:    # get field names from first line
+            fields = [ field2val(f) for f in lines.pop(0).split(sep) ]
+        if not lines: continue
+        cols = lines2fields(lines, sep, len(fields))
+        yield dict(zip(fields, map(fields2col, cols)))
+
+# make a compiled bytes regex matching one CSV line that captures only the
+#   fields at the wanted indexes, later fields are optional so short lines
+#   still match, giving None for their missing captured fields
+def line_regex(sep, wanted):
+    sep = re.escape(sep.encode())
+    field = b'[^' + sep + b'\r\n]*'
+    pat = None
+    for i in reversed(range(max(wanted) + 1)):
+        f = b'(' + field + b')' if i in wanted else field
+        if pat is None:
+            pat = f + b'[^\n]*'                # rest of the line is skipped
+        else:
+            pat = f + b'(?:' + sep + pat + b')?'
+    return re.compile(b'^(?=[^\r\n])' + pat, re.M)    # skip blank lines
+
+# generator function to parse a CSV file through a memory map into column blocks
+#   only the fields named in want are decoded and converted (projection),
+#   the others stay as raw bytes and are never decoded to strings.
+#   Yields dicts like csv_column_blocks() but only of the wanted fields.
+#   The field names are read from the first line if not provided.
+#   Reads the whole file after the first line, or the bytes start to end.
+def csv_mmap_blocks(path, want, sep=",", fields=None, start=None, end=None,
+                    size=1<<22, encoding='utf-8'):
+    with open(path, 'rb') as f:
+        if not fields or start is None:
+            head = f.readline()
+            if not fields:
+                fields = [ field2val(p) for p in
+                            head.decode(encoding).strip().split(sep) ]
+            if start is None: start = len(head)
+        fsize = f.seek(0, 2)
+        end = fsize if end is None else min(end, fsize)
+        if start >= end: return
+        nf = len(fields)
+        wanted = [ fields.index(w) for w in want ]
+        bsep = sep.encode(encoding)
+        regex = None
+        with mmap(f.fileno(), 0, access=ACCESS_READ) as mm:
+            while start < end:
+                stop = mm.find(b'\n', min(start + size, end) - 1, end) + 1 or end
+                block = mm[start:stop]
+                start = stop
+                lines = list(filter(None, block.split(b'\n')))
+                if not lines: continue
+                if (b'\r' not in block and list(map(bytes.count, lines,
+                        repeat(bsep))).count(nf-1) == len(lines)):
+                    # every line has all the fields, so split them all at once
+                    flat = bsep.join(lines).split(bsep)
+                    cols = { i: flat[i::nf] for i in wanted }
+                else:
+                    # scan ragged lines with a regex that captures only
+                    # the wanted fields, missing fields are None
+                    regex = regex or line_regex(sep, set(wanted))
+                    found = regex.findall(block)
+                    if not found: continue
+                    groups = sorted(set(wanted))    # capture group order
+                    found = zip(*found) if len(groups) > 1 else [ found ]
+                    cols = { i: [ c or b'' for c in col ]
+                             for i, col in zip(groups, found) }
+                yield { name: fields2col(
+                            b'\n'.join(cols[i]).decode(encoding).split('\n'))
+                        for name, i in zip(want, wanted) }
+
+# read a whole CSV file into a dict of columns keyed on field names
+#   field names are read from the first line if not provided
+def csv_columns(infile, sep=",", fields=None, size=1<<20):
+    columns = {}
+    for cols in csv_column_blocks(csv_blocks(infile, size), sep, fields):
+        for f, col in cols.items():
+            columns[f] = extend_col(columns[f], col) if f in columns else col
+    return columns
+
 # make a line of CSV for output from a list of values
 def row2csv(row, sep=","):
     return sep.join(val2field(v) for v in row)
@@ -0,0 +1,71 @@
+"""This module provides lazy rankings of records that only sort on demand"""
+
+# import as private attributes so objects from other modules
+# do not clutter the documentation for this one
+from heapq import nlargest as _nlargest, nsmallest as _nsmallest
+from operator import itemgetter as _itemgetter
+
+class Ranking:
+    r"""
+    Orderings of a collection of records, made only when they are used.
+
+    A key is either a field name, to order dict records by that field,
+    a function of a record like the key argument of sorted(), or None
+    to order the records themselves:
+
+        from ranking import Ranking
+
+        rank = Ranking(data.values())
+        hottest = rank.top(10, 'max')       # ten highest max
+        coldest = rank.bottom(10, 'min')    # ten lowest min
+        by_avg = rank.asc('avg')            # all, lowest avg first
+
+    Each full ordering is sorted at most once and kept. When both the
+    ascending and descending orders of the same key are used, the second
+    is sorted from the first, which is nearly linear time. top() and
+    bottom() use a heap of n records instead of a full sort, unless the
+    full ordering has already been made.
+
+    All orderings are stable, so records with equal keys stay in their
+    original order, exactly as from sorted() and sorted(reverse=True)
+    on the original records. Functions used as keys are kept by identity,
+    so define a key function once and reuse it to share the orderings.
+    """
+
+    def __init__(self, records):
+        r"""Make a ranking of an iterable of records, kept as a list."""
+        self.records = list(records)
+        self._asc = {}
+        self._desc = {}
+
+    @staticmethod
+    def _keyfunc(key):
+        return _itemgetter(key) if type(key) == str else key
+
+    def asc(self, key=None):
+        r"""Get all records ordered by key, lowest first."""
+        if key not in self._asc:
+            # the descending order is stable too, so re-sorting it gives
+            # ties in their original order, same as sorting the records
+            base = self._desc.get(key, self.records)
+            self._asc[key] = sorted(base, key=self._keyfunc(key))
+        return self._asc[key]
+
+    def desc(self, key=None):
+        r"""Get all records ordered by key, highest first."""
+        if key not in self._desc:
+            base = self._asc.get(key, self.records)
+            self._desc[key] = sorted(base, key=self._keyfunc(key), reverse=True)
+        return self._desc[key]
+
+    def top(self, n, key=None):
+        r"""Get the n records with the highest keys, highest first."""
+        if key in self._desc:
+            return self._desc[key][:n]
+        return _nlargest(n, self.records, key=self._keyfunc(key))
+
+    def bottom(self, n, key=None):
+        r"""Get the n records with the lowest keys, lowest first."""
+        if key in self._asc:
+            return self._asc[key][:n]
+        return _nsmallest(n, self.records, key=self._keyfunc(key))
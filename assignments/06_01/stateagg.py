@@ -0,0 +1,178 @@
+r"""
+Per-state temperature aggregation of weather CSV column blocks.
+
+The aggregates are a dict of three GroupStats keyed on state name:
+'min' of the min temperatures, 'max' of the max temperatures, and
+'avg' to sum and count the average temperatures. Groups are kept in the
+order that the states were first seen, so that partial aggregates of
+consecutive parts of a file merged in order give exactly the same
+result as one serial pass.
+"""
+
+import os, sys, json, time, hashlib
+from itertools import compress
+
+from aggregate import GroupStats
+from csvsimple import csv_column_blocks, csv_range_blocks, csv_mmap_blocks
+
+# the fields needed from the CSV file for the state aggregates
+state_fields = [ 'state', 'statename', 'mintemp', 'maxtemp', 'avgtemp' ]
+
+# make a new empty set of state aggregates
+def new_states():
+    return { 'min': GroupStats(), 'max': GroupStats(), 'avg': GroupStats() }
+
+# add column blocks into the state aggregates
+#   snapshot if given is called after each block with the counts so far
+#   and the aggregates, see state_snapshots()
+#   returns counts of all records and of good records with a state
+def state_aggregate(col_blocks, aggs, snapshot=None):
+    rec_count = 0
+    good_count = 0
+    for cols in col_blocks:
+        has_state = cols['state']           # stateless data are airports
+        rec_count += len(has_state)         # count the total number of records
+        states = list(compress(cols['statename'], has_state))
+        good_count += len(states)           # count the good records we can use
+        for f, col in (('min', 'mintemp'), ('max', 'maxtemp'), ('avg', 'avgtemp')):
+            aggs[f].add_all(states, compress(cols[col], has_state))
+        if snapshot: snapshot(rec_count, good_count, aggs)
+    return rec_count, good_count
+
+# make a snapshot function for state_aggregate() that writes a line of
+#   progress to file at most every interval seconds: the records so far,
+#   the rate, the states seen, and the overall min and max so far
+def state_snapshots(interval, file=sys.stderr):
+    began = time.time()
+    due = began + interval
+    def snapshot(rec_count, good_count, aggs):
+        nonlocal due
+        now = time.time()
+        if now < due: return
+        due = now + interval
+        mins = aggs['min'].values()
+        maxs = aggs['max'].values()
+        print('  {:.1f}s: {:,} records ({:,} good) at {:,.0f} records/s, {} states seen'
+              .format(now - began, rec_count, good_count, rec_count / (now - began), len(mins))
+              + (', min {:.1f}F max {:.1f}F'.format(min(st.min for st in mins),
+                                                  max(st.max for st in maxs)) if mins else ''),
+              file=file, flush=True)
+    return snapshot
+
+# aggregate one byte range of a CSV file, used as a worker process function
+#   returns record counts, the partial aggregates, and the time taken
+#   use_mmap reads only the needed fields through a memory map
+def state_range(path, start, end, sep, fields, use_mmap=False):
+    began = time.time()
+    aggs = new_states()
+    if use_mmap:
+        blocks = csv_mmap_blocks(path, state_fields, sep, fields, start, end)
+    else:
+        blocks = csv_column_blocks(csv_range_blocks(path, start, end), sep, fields)
+    rec_count, good_count = state_aggregate(blocks, aggs)
+    return rec_count, good_count, aggs, time.time() - began
+
+# merge partial state aggregates of a later part of the file into aggs
+def merge_states(aggs, more):
+    for f in aggs:
+        aggs[f].merge(more[f])
+    return aggs
+
+# make the dict of state records of min, max, sum, num from the aggregates
+def state_records(aggs):
+    return { state: {
+                'state': state,
+                'min': aggs['min'][state].min,
+                'max': aggs['max'][state].max,
+                'sum': st.sum,      # to sum the averages (and later divide by the num)
+                'num': st.num,      # to count the number of avg samples
+            } for state, st in aggs['avg'].items() }
+
+# save state aggregates as a dict of plain values for JSON
+def dump_states(aggs):
+    return { f: aggs[f].dump() for f in aggs }
+
+# make state aggregates from a dict made by dump_states()
+def load_states(dumped):
+    return { f: GroupStats.load(dumped[f]) for f in ('min', 'max', 'avg') }
+
+# get the end offset of the last complete line of a file, so a line
+# that is still being appended is left for the next run
+def complete_end(path, size=1<<16):
+    with open(path, 'rb') as f:
+        end = f.seek(0, 2)
+        while end > 0:
+            pos = max(0, end - size)
+            f.seek(pos)
+            cut = f.read(end - pos).rfind(b'\n')
+            if cut >= 0: return pos + cut + 1
+            end = pos
+    return 0
+
+# update a hash object with the bytes of a file from start to end
+def hash_range(h, path, start, end, size=1<<22):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while start < end:
+            block = f.read(min(size, end - start))
+            if not block: break
+            h.update(block)
+            start += len(block)
+    return h
+
+# the type of each field of a state file
+state_file_types = { 'source': str, 'fields': list, 'offset': int, 'hash': str,
+                     'records': int, 'good': int, 'states': dict }
+
+# check that a loaded state file has every field with the right type
+def valid_state(prev):
+    return isinstance(prev, dict) and all(
+        isinstance(prev.get(k), t) for k, t in state_file_types.items())
+
+# bring the state aggregates of a growing CSV file up to date
+#   state_file is the path of a JSON file holding the aggregates, counts,
+#   and the offset and prefix hash of the part of the file already read.
+#   Only lines appended since then are read, unless the file no longer
+#   starts with the same bytes, then it is all read again.
+#   returns the aggregates, total record counts, new record count, and
+#   how the state was found: 'appended' if it was used, 'new' if there
+#   was no state file, 'changed' if the input file changed, or 'broken'
+#   if the state file could not be used; all is read unless 'appended'
+def state_update(path, state_file, sep, fields, start, use_mmap=False):
+    try:
+        with open(state_file) as f:
+            prev = json.load(f)
+        status = 'changed' if valid_state(prev) else 'broken'
+    except FileNotFoundError:
+        prev, status = None, 'new'
+    except (OSError, ValueError):
+        prev, status = None, 'broken'
+    end = complete_end(path)
+    h = hashlib.blake2b(digest_size=16)     # hash of the file up to end
+    if (status == 'changed' and prev['source'] == os.path.abspath(path)
+            and prev['fields'] == fields and start <= prev['offset'] <= end
+            and hash_range(h, path, 0, prev['offset']).hexdigest() == prev['hash']):
+        try:
+            aggs = load_states(prev['states'])
+            status = 'appended'
+        except (AttributeError, KeyError, TypeError, ValueError):
+            status = 'broken'
+    if status != 'appended':
+        prev = { 'offset': start, 'records': 0, 'good': 0 }
+        aggs = new_states()
+        h = hash_range(hashlib.blake2b(digest_size=16), path, 0, end)
+    else:
+        hash_range(h, path, prev['offset'], end)
+    recs, good, more, took = state_range(path, prev['offset'], end,
+                                         sep, fields, use_mmap)
+    merge_states(aggs, more)
+    prev['records'] += recs
+    prev['good'] += good
+    prev.update({ 'source': os.path.abspath(path), 'fields': fields,
+                  'offset': end, 'hash': h.hexdigest(),
+                  'states': dump_states(aggs) })
+    tmp = state_file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(prev, f)
+    os.replace(tmp, state_file)
+    return aggs, prev['records'], prev['good'], recs, status
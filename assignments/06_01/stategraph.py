@@ -0,0 +1,108 @@
+r"""
+Bar graphs of the min, max and average temperature of each state.
+
+A StateGraph is a figure template for a number of states: the figure,
+axes, bars, average markers, ticks and legend are made once, and each
+graph only updates the bar heights, markers, tick labels and title, so
+graphs of the same states in different orders are cheap to draw:
+
+    from stategraph import StateGraph
+
+    graph = StateGraph(len(records))
+    graph.update(rank.asc('max'), 'sorted by max').save('test_max.png')
+    graph.update(rank.asc('min'), 'sorted by min').save('test_min.png')
+
+Without a figure given the template draws with the non-interactive Agg
+backend, so it needs no display and can be used in worker processes.
+render_all() saves a list of graphs in a pool of processes, each
+keeping its own template, and returns how long each graph took.
+"""
+
+import os, time
+from multiprocessing import Pool
+from matplotlib.figure import Figure                        # figure without pyplot
+from matplotlib.backends.backend_agg import FigureCanvasAgg # draws to an image
+from matplotlib.ticker import MultipleLocator as tick_every # tick interval object
+
+class StateGraph:
+    r"""
+    Figure template of a bar graph of n states, to update for each order.
+
+    Give a figure (such as plt.figure()) to draw on it instead of on a
+    new Agg figure, for showing the graph interactively.
+    """
+
+    def __init__(self, n, fig=None):
+        r"""Make the template figure for n states."""
+        if fig is None:
+            # create the "figure" with the size in inches and the resolution in dpi (dots per inch)
+            fig = Figure(figsize=(12,6), dpi=100)
+            FigureCanvasAgg(fig)
+        self.n = n
+        self.fig = fig
+        # create the graph (axes object) within the figure using these margin sizes
+        ax = self.ax = fig.add_axes((0.05, 0.21, 0.92, 0.73)) # (left, bottom, width, height)
+        x = range(n)
+        # red bars of the max, blue bars of the min, "max" and "min" in legend
+        self.max_bars = ax.bar(x, [ 0 ] * n, label='max', color='red')
+        self.min_bars = ax.bar(x, [ 0 ] * n, label='min', color='blue')
+        # avg in the legend, light green, diamonds, with no linestyle (ls)
+        self.avg_line, = ax.plot(x, [ 0 ] * n, label='avg', color='lightgreen',
+                                 ls='', marker='D', markersize=6)
+        # a tick for each state, labelled with its name in each update
+        ax.set_xticks(x)
+        # put the state names at angle -90 in a small font
+        ax.tick_params(axis='x', labelsize='small', rotation=-90)
+        # limit the x scale so that the bars fill the available space neatly
+        ax.set_xlim(-0.5, n-0.5)
+        # change the rotation and label of the y axis
+        ax.set_ylabel('Celsius', rotation=-90)
+        # default tick spacing too big so set it every 10 degrees celsius
+        ax.yaxis.set_major_locator(tick_every(10))
+        # turn on the grid as a dotted line
+        ax.grid(linestyle=':')
+        # place the legend in the upper center with a drop shadow
+        ax.legend(loc='upper center', shadow=True)
+
+    def update(self, data, title):
+        r"""Show the list of n state records in order, with a title."""
+        if len(data) != self.n:
+            raise ValueError('graph is for %d states, not %d' % (self.n, len(data)))
+        for bar, rec in zip(self.max_bars, data):
+            bar.set_height(rec['max'])
+        for bar, rec in zip(self.min_bars, data):
+            bar.set_height(rec['min'])
+        self.avg_line.set_ydata([ rec['avg'] for rec in data ])
+        self.ax.set_xticklabels([ rec['state'] for rec in data ])
+        self.ax.set_title(title)
+        # fit the y scale to the new heights
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        return self
+
+    def save(self, filename):
+        r"""Save the graph as an image file."""
+        self.fig.savefig(filename)
+        return self
+
+_template = None    # the StateGraph of each worker process, made when needed
+
+# draw one graph and save it, reusing the template of this process
+#   returns the seconds it took
+def render(data, title, filename):
+    global _template
+    start = time.time()
+    if _template is None or _template.n != len(data):
+        _template = StateGraph(len(data))
+    _template.update(data, title).save(filename)
+    return time.time() - start
+
+# draw and save a list of (data, title, filename) graphs in a pool of
+#   up to workers processes (default one per core), or in this process
+#   if there is only one; returns the seconds each graph took, in order
+def render_all(graphs, workers=None):
+    workers = min(len(graphs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [ render(*g) for g in graphs ]
+    with Pool(workers) as pool:
+        return pool.starmap(render, graphs)
@@ -9,6 +9,8 @@ __date__ = '8th September 2018'
 from sys import stdout as _stdout
 from math import ceil as _ceil
 from re import sub as _sub, match as _match, fullmatch as _fullmatch
+from operator import itemgetter as _itemgetter, sub as _subtract
+from itertools import repeat as _repeat, compress as _compress, islice as _islice
 
 class TablePrinter:
     r"""
@@ -57,6 +59,7 @@ class TablePrinter:
 
     data()   Optionally load the data before calling print() without args.
     print()  Print given data, or the data already loaded by data().
+    stream() Print records from an iterator as they arrive.
     fields() Set fields of the dict records to print as table columns.
     heads()  Set headings for the table columns corresponding to each field.
     forms()  Set format and alignment for each field to be printed.
@@ -89,6 +92,9 @@ class TablePrinter:
         'sw': '╰─', 's': '─', 'st': '─┴─', 'se': '─╯',
     }
 
+    # type codes of the values that can be printed, in order of precedence
+    _type_codes = { int: 'd', float: 'f', str: 's' }
+
     def __init__(self):
         r"""Just use tp = TablePrinter() without arguments."""
         self._data = []
@@ -310,22 +316,85 @@ class TablePrinter:
         the TablePrinter object using the other methods. It is recommended
         to at least set the field order with fields() and the column
         headings with heads() and perhaps some of the formats with forms().
+
+        The whole table is built in memory and written to the output file
+        with a single write() call, so large tables print quickly to files
+        and pipes. See stream() for records that do not fit in memory.
         """
         data = records or self._data
         if not data: return
 
-        fields = self._fields
+        fields = self._fields or sorted(data[0].keys())
+        heads, forms = self._setup(fields)
+        cols = [ list(map(_itemgetter(f), data)) for f in fields ]
+        sizes = self._measure(fields, cols, heads, forms)
+        layout = self._layout(fields, sizes, heads, forms,
+                              self._start, len(data))
+        if self._start is not None:
+            cols = [ range(self._start, self._start + len(data)) ] + cols
+
+        # format every row at once with the compiled row format
+        rows = list(map(layout['rowfmt'].format, *cols))
+        self._write(layout, rows)
+        return self
+
+    def stream(self, records, window=1000):
+        r"""
+        Print records from any iterable as they arrive, without keeping them.
+
+        This is for tables too big to hold in memory, such as the records
+        of a huge CSV file straight from a generator:
+
+            with open('huge.csv') as f:
+                tp.stream(csv_records(csv_rows(f)))
+
+        Records are read in windows of the given number of records. The
+        column widths and formats are worked out from the first window,
+        or from the widths set with forms(), and the rows of each window
+        are written as soon as it is full. If a later window needs wider
+        columns (or more decimal places) the table is closed and a new
+        header is printed with the new widths, which are then kept for
+        the rest of the records. Memory use depends on the window size
+        only, not on the number of records.
+
+        The table is always printed in one part, the parts() setting is
+        ignored because the rows of a part are not known until the end.
+        Row numbering from num() continues across new headers.
+        """
+        records = iter(records)
+        block = list(_islice(records, window))
+        if not block: return
+
+        fields = self._fields or sorted(block[0].keys())
+        heads, forms = self._setup(fields)
+        sizes = None
+        layout = None
+        count = 0
+        while block:
+            cols = [ list(map(_itemgetter(f), block)) for f in fields ]
+            sizes = self._measure(fields, cols, heads, forms, sizes)
+            if self._start is not None:
+                first = self._start + count
+                cols = [ range(first, first + len(block)) ] + cols
+            count += len(block)
+            new = self._layout(fields, sizes, heads, forms, self._start, count)
+            lines = []
+            if new != layout:
+                # the columns have changed so start a new table
+                if layout: lines.append(layout['botrule'])
+                lines += [ new['toprule'], new['header'], new['midrule'] ]
+                layout = new
+            lines += map(layout['rowfmt'].format, *cols)
+            self._file.write(''.join([ self._indent + line + '\n'
+                                       for line in lines ]))
+            block = list(_islice(records, window))
+        self._file.write(self._indent + layout['botrule'] + '\n')
+        return self
+
+    def _setup(self, fields):
+        # get dicts of the headings and format codes set for the fields
         forms = self._forms
         heads = self._heads
-        parts = self._parts
-        indent = self._indent
-        sep = self._sep
-        box = self._box
-        outfile = self._file
-        start = self._start
-
-        if not fields:
-            fields = sorted(data[0].keys())
 
         if heads and type(heads) == dict:
             heads = heads.copy()
@@ -343,29 +412,49 @@ class TablePrinter:
             forms = dict(zip(fields,forms))
         if not forms:
             forms = {}
-
-        widths = { f: len(heads[f]) for f in fields }
-        types  = { f: '' for f in fields }
-        magn   = { f: None for f in fields }
-        pres   = { f: None for f in fields }
+        return heads, forms
+
+    def _measure(self, fields, cols, heads, forms, sizes=None):
+        # measure the values of the fields given a list of column value
+        # lists, one per field. Returns a dict of the width, type code,
+        # and digits before (magn) and after (pres) the decimal point of
+        # each field. If the sizes of previous columns are given they are
+        # updated, so the result is the same as measuring them all at once.
+        if sizes is None:
+            sizes = { f: { 'width': len(heads[f]), 'type': '',
+                           'magn': 0, 'pres': 0 } for f in fields }
+        for f, col in zip(fields, cols):
+            size = sizes[f]
+            # format all the values of the column once to measure them
+            fmt = forms[f] if f in forms else ''
+            valstrs = list(map(format, col, _repeat(fmt)))
+            size['width'] = max(size['width'], max(map(len, valstrs), default=0))
+            size['type'] = max([ size['type'] ] + [ TablePrinter._type_codes[t]
+                                                    for t in set(map(type, col)) ])
+            if size['type'] == 'f' and f not in forms:
+                # measure digits either side of the point of the floats,
+                # ints have no point so only the floats are measured
+                points = list(map(str.find, valstrs, _repeat('.')))
+                found = list(map((-1).__ne__, points))
+                size['magn'] = max(size['magn'],
+                                   max(_compress(points, found), default=0))
+                size['pres'] = max(size['pres'],
+                                   max(map(_subtract, map(len, _compress(valstrs, found)),
+                                       _compress(points, found)), default=1) - 1)
+        return sizes
+
+    def _layout(self, fields, sizes, heads, forms, start, count):
+        # work out the column widths and formats for the fields from the
+        # sizes measured by _measure() and the format codes from _setup().
+        # If start is not None there is a first column of row numbers
+        # from start to start+count-1.
+        # Returns a dict of the rules and formats used to print the table.
+        box = self._box
+        forms = forms.copy()
+        widths = { f: sizes[f]['width'] for f in fields }
         hform  = {}
         for f in fields:
-            fmt = '{:'+forms[f]+'}' if f in forms else '{}'
-            magn[f], pres[f] = 0, 0
-            for rec in data:
-                val = rec[f]
-                valstr = fmt.format(val)
-                widths[f] = max(widths[f], len(valstr))
-                types[f] = max(types[f],
-                    {int: 'd', float: 'f', str: 's'}[type(val)])
-                if types[f] != 'f': continue
-                valstr = valstr.strip()
-                point = valstr.find('.') + 1
-                if point:
-                    pres[f] = max(pres[f], len(valstr)-point)
-                    magn[f] = max(magn[f], point-1)
-
-
+            ty = sizes[f]['type']
             if f in forms:
                 fmt = forms[f]
                 # first char of format_spec can be any fill char but
@@ -381,66 +470,66 @@ class TablePrinter:
                 # type letters include:
                 # b=binary, c=character, d=int, e=exponent, f=float,
                 # g=general, n=int with commas, o=octal, s=string, x=hex
-                ty = ty or types[f]
+                ty = ty or sizes[f]['type']
                 al = al or '<' if ty == 's' else '>'
                 if wi: widths[f] = max(widths[f], int(wi))
                 wi = str(widths[f])
                 forms[f] = fi + al + si + pa + wi + gr + pr + ty
             else:
-                al = '<' if types[f] == 's' else '>'
-                if types[f] == 'f':
-                    widths[f] = max(widths[f], magn[f] + 1 + pres[f])
-                    forms[f] = al + str(widths[f]) +'.'+ str(pres[f]) +'f'
+                al = '<' if ty == 's' else '>'
+                if ty == 'f':
+                    magn, pres = sizes[f]['magn'], sizes[f]['pres']
+                    widths[f] = max(widths[f], magn + 1 + pres)
+                    forms[f] = al + str(widths[f]) +'.'+ str(pres) +'f'
                 else:
-                    forms[f] = al + str(widths[f]) + types[f]
+                    forms[f] = al + str(widths[f]) + ty
             hform[f] = al + str(widths[f]) + 's'
 
         if start is not None:
-            numlen = max(len(str(start)), len(str(start+len(data)-1)))
+            numlen = max(len(str(start)), len(str(start+count-1)))
             fields = [ '#' ] + fields
-            heads['#'] = '#'
+            heads = dict(heads, **{ '#': '#' })
             widths['#'] = numlen
             forms['#'] = '>' + str(numlen) + 'd'
             hform['#'] = '>' + str(numlen) + 's'
 
-        toprule  = ( box['nw']
-                   + box['nt'].join([box['n'] * widths[f] for f in fields])
-                   + box['ne'] )
-        midrule  = ( box['wt']
-                   + box['x'].join([box['h'] * widths[f] for f in fields])
-                   + box['et'] )
-        botrule  = ( box['sw']
-                   + box['st'].join([box['s'] * widths[f] for f in fields])
-                   + box['se'] )
-        blankrow = ( box['w']
-                   + box['v'].join([box[' '] * widths[f] for f in fields])
-                   + box['e'] )
-        rowfmt   = ( box['w']
-                   + box['v'].join(['{:'+forms[f]+'}' for f in fields ])
-                   + box['e'] )
         headfmt  = ( box['w']
                    + box['v'].join(['{:'+hform[f]+'}' for f in fields ])
                    + box['e'] )
-
-        header = headfmt.format(*[ heads[f] for f in fields ])
-        print(indent + sep.join([ toprule ] * parts), file=outfile)
-        print(indent + sep.join([ header  ] * parts), file=outfile)
-        print(indent + sep.join([ midrule ] * parts), file=outfile)
-        step = _ceil(len(data) / parts)
-        for r in range(0, step):
-            print(indent, end='', file=outfile)
-            for c in range(0, parts):
-                i = step*c+r
-                if c: print(sep, end='', file=outfile)
-                if i < len(data):
-                    rowdat = [ data[i][f] for f in fields if f != '#' ]
-                    if start is not None:
-                        rowdat = [ start + i ] + rowdat
-                    row = rowfmt.format(*rowdat)
-                else:
-                    row = blankrow
-                print(row, end='', file=outfile)
-            print('', file=outfile)
-        print(indent + sep.join([ botrule ] * parts), file=outfile)
-        return self
-
+        return {
+            'toprule':  ( box['nw']
+                        + box['nt'].join([box['n'] * widths[f] for f in fields])
+                        + box['ne'] ),
+            'midrule':  ( box['wt']
+                        + box['x'].join([box['h'] * widths[f] for f in fields])
+                        + box['et'] ),
+            'botrule':  ( box['sw']
+                        + box['st'].join([box['s'] * widths[f] for f in fields])
+                        + box['se'] ),
+            'blankrow': ( box['w']
+                        + box['v'].join([box[' '] * widths[f] for f in fields])
+                        + box['e'] ),
+            'rowfmt':   ( box['w']
+                        + box['v'].join(['{:'+forms[f]+'}' for f in fields ])
+                        + box['e'] ),
+            'header':   headfmt.format(*[ heads[f] for f in fields ]),
+        }
+
+    def _write(self, layout, rows):
+        # write the formatted rows as a table in parts with one write() call
+        parts = self._parts
+        indent = self._indent
+        sep = self._sep
+        lines = [ indent + sep.join([ layout[rule] ] * parts)
+                  for rule in ('toprule', 'header', 'midrule') ]
+        if parts == 1:
+            lines.extend([ indent + row for row in rows ] if indent else rows)
+        else:
+            # part c of line r is row step*c+r, padded with blank rows
+            step = _ceil(len(rows) / parts)
+            rows = rows + [ layout['blankrow'] ] * (step*parts - len(rows))
+            lines.extend([ indent + sep.join(line) for line in
+                        zip(*[ rows[c:c+step] for c in range(0, step*parts, step) ]) ])
+        lines.append(indent + sep.join([ layout['botrule'] ] * parts))
+        lines.append('')
+        self._file.write('\n'.join(lines))
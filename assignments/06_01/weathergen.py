@@ -0,0 +1,65 @@
+r"""
+Generate synthetic weather CSV files for benchmarking.
+
+The files use the same ';' separated layout as the real station feeds:
+
+    Date;Station;Lon;Lat;Elev;AvgTemp;MaxTemp;MinTemp;StateName;Name;State
+
+Quoted fields are strings and unquoted fields are numbers, matching the
+rules in csvsimple. Stations with no state (airports) have an empty
+State field and a StateName of "0".
+
+Usage as a script:
+
+    weathergen.py <outfile> [ <rows> ] [ <stations> ] [ <states> ]
+"""
+
+import sys, random
+
+header = ('"Date";"Station";"Lon";"Lat";"Elev";"AvgTemp";"MaxTemp";"MinTemp";'
+          '"StateName";"Name";"State"')
+
+# build a list of fake stations, each a tuple of fixed fields
+def make_stations(num, states=50, seed=1):
+    rnd = random.Random(seed)
+    stations = []
+    for i in range(num):
+        s = rnd.randrange(states + 1)   # state number 0 means an airport
+        stations.append((
+            'ST%06d' % i,
+            round(rnd.uniform(-125, -67), 4),   # longitude
+            round(rnd.uniform(25, 49), 4),      # latitude
+            round(rnd.uniform(0, 3000), 1),     # elevation
+            'State %02d' % s if s else '0',     # state name
+            'Station %d' % i,
+            'S%02d' % s if s else '',           # state code
+        ))
+    return stations
+
+# generator of CSV lines (without newlines) including the header line
+def csv_lines(rows, stations=1000, seed=1, states=50):
+    rnd = random.Random(seed)
+    stats = make_stations(stations, states, seed)
+    yield header
+    for i in range(rows):
+        sid, lon, lat, elev, sname, name, st = stats[i % len(stats)]
+        lo = round(rnd.uniform(-20, 60), 1)
+        hi = round(lo + rnd.uniform(0, 40), 1)
+        avg = round((lo + hi) / 2, 1)
+        yield ('"2018-%02d-%02d";"%s";%s;%s;%s;%s;%s;%s;"%s";"%s";%s'
+               % (i // 28 % 12 + 1, i % 28 + 1, sid, lon, lat, elev,
+                  avg, hi, lo, sname, name, '"%s"' % st if st else ''))
+
+# write a synthetic CSV file with the given number of data rows
+def write_csv(path, rows, stations=1000, seed=1, states=50):
+    with open(path, 'w') as f:
+        for line in csv_lines(rows, stations, seed, states):
+            f.write(line + '\n')
+    return path
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        exit(1)
+    args = list(map(int, sys.argv[2:5]))
+    write_csv(sys.argv[1], *args[:2], states=args[2] if len(args) > 2 else 50)
@@ -1,60 +1,30 @@
-import csv
-from random import shuffle, randint
-
-with open("iris.data", 'r') as f:
-    res_dat = {}
-    reader = csv.reader(f)
-    data = list(reader)
-    cla = []
-    for i in range(1, len(data) - 1):
-        label = data[i][4]
-        dat_row = list(map(float, data[i][:4]))
-        dat_row.append(i)   # append the index of each record
-        if label not in cla:
-            cla.append(label)
-            res_dat[label] = [dat_row]
-        else:
-            new_val = res_dat[label].append(dat_row)
-
-
-def holdout(dict_dat, p):
-    train_dat = {}
-    test_dat = {}
-    tra_c = {}
-    te_c = {}
-    for e in cla:
-        res = chop_data(dict_dat[e], p)
-        tra_c[e] = len(res[0])
-        te_c[e] = len(res[1])
-        if e in train_dat.keys():
-            train_dat[e].append(res[0])
-            test_dat[e].append(res[1])
-        else:
-            train_dat[e] = res[0]
-            test_dat[e] = res[1]
-    return train_dat, test_dat, tra_c, te_c
-
-
-def chop_data(dat1, p):
-    train = []
-    test = []
-    ind = list(range(0, len(dat1)))
-    shuffle(ind)
-    for k in ind[:int(p*len(ind))]:
-        train.append(dat1[k])
-    for j in ind[int(p*len(ind)):]:
-        test.append(dat1[j])
-    return train, test
+from collections import Counter
+from random import randint
+from splitter import Matrix, stratified_holdout
+
+iris = Matrix.from_csv("iris.data")
+cla = iris.classes()
+
+
+def holdout(p, seed=None):
+    train, test = stratified_holdout(iris.labels, p, seed)
+    train = iris.view(train)
+    test = iris.view(test)
+    tra_n = Counter(train.labels)
+    te_n = Counter(test.labels)
+    tra_c = {e: tra_n[e] for e in cla}
+    te_c = {e: te_n[e] for e in cla}
+    return train, test, tra_c, te_c
 
 
 def display_info(p):
-    res = holdout(res_dat, p)
+    res = holdout(p)
     train = res[0]
     test = res[1]
     tra_c = res[2]
     te_c = res[3]
     print("Total train sample = {} {}".
-          format(count_tot_sample(train), tra_c))
+          format(len(train), tra_c))
     print('\n')
     print('Top 5 rows Train_X\n')
     train_set = top_5(train)
@@ -65,7 +35,7 @@ def display_info(p):
 
     print('\n')
     print("Total test sample = {} {}\n".
-          format(count_tot_sample(test), te_c))
+          format(len(test), te_c))
 
     test_set = top_5(test)
 
@@ -76,44 +46,31 @@ def display_info(p):
     display_y(test_set)
 
 
+# the index shown is the 1-based number of the data row in iris.data,
+# not counting the header line
 def display_x(tup):
     for e in tup:
-        print("index: {}, {}".format(e[0][-1], e[0][:4]))
+        print("index: {}, {}".format(e[0] + 1, iris.row(e[0]).tolist()))
 
 
 def display_y(tup):
     for e in tup:
-        print("index: {}, {}".format(e[0][-1], e[1]))
+        print("index: {}, {}".format(e[0] + 1, e[1]))
 
 
-def top_5(dict0):
-    keys = list(dict0.keys())  # get the list of keys (Ys)
+def top_5(view):
+    classes = view.by_class()
+    keys = list(classes.keys())  # get the list of keys (Ys)
     c = 0
     res = []
     while c < 5:
         rad = randint(0, len(keys) - 1)  # get random index of keys
         y = keys[rad]
-        x = dict0[y][c]
+        x = classes[y].index[c]     # row number of the c-th row of class y
         res.append((x, y))
         c += 1
     return res
 
 
-def count_tot_sample(dict1):
-    tot_sample = 0
-    for key in dict1:
-        tot_sample += len(dict1[key])
-    return tot_sample
-
-
-display_info(0.7)  # adjust the fraction here
-
-
-
-
-
-
-
-
-
-
+if __name__ == '__main__':
+    display_info(0.7)  # adjust the fraction here
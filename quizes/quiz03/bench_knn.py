@@ -0,0 +1,60 @@
+"""Benchmark KD-tree and brute force k-NN queries on enlarged iris-like data.
+
+Usage: python bench_knn.py [max rows] [queries]
+
+Rows are drawn from a normal distribution per class with the mean and
+standard deviation of each feature of that class in iris.data, for 10k
+rows and then 10 times more up to max rows (1M by default). For each
+size the time to build the index and the average time per query is
+shown. The KD-tree query time grows far slower than the number of rows,
+while brute force grows in proportion to it.
+"""
+import csv
+import random
+import sys
+import time
+from statistics import mean, stdev
+from knn import KDTree, BruteIndex
+
+max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+k = 5
+
+with open("iris.data", 'r') as f:
+    rows = [r for r in list(csv.reader(f))[1:] if r]
+classes = {}
+for r in rows:
+    classes.setdefault(r[4], []).append(list(map(float, r[:4])))
+shapes = [[(mean(col), stdev(col)) for col in zip(*pts)] for pts in classes.values()]
+
+
+def iris_like(n, seed):
+    rnd = random.Random(seed)
+    return [[rnd.gauss(m, s) for m, s in rnd.choice(shapes)] for _ in range(n)]
+
+
+def timed(func):
+    start = time.time()
+    res = func()
+    return res, time.time() - start
+
+
+qs = iris_like(queries, 2)
+print('{:>9} {:>10} {:>12} {:>12} {:>9}'.format(
+      'rows', 'build s', 'tree ms/q', 'brute ms/q', 'speedup'))
+rows = 10000
+while rows <= max_rows:
+    points = iris_like(rows, 1)
+    tree, build = timed(lambda: KDTree(points))
+    brute = BruteIndex(points)
+    found, t_tree = timed(lambda: [tree.query(q, k) for q in qs])
+    # brute force is slow on big data so only time some of the queries
+    few = qs[:max(1, queries * 10000 // rows)]
+    found_b, t_brute = timed(lambda: [brute.query(q, k) for q in few])
+    assert found[:len(few)] == found_b
+    per_tree = t_tree / len(qs) * 1000
+    per_brute = t_brute / len(few) * 1000
+    print('{:>9,} {:10.2f} {:12.3f} {:12.3f} {:8.1f}x'.format(
+          rows, build, per_tree, per_brute, per_brute / per_tree), flush=True)
+    del points, tree, brute
+    rows *= 10
@@ -0,0 +1,134 @@
+"""Cross-validation of classifiers on a Matrix, with folds run in parallel.
+
+    from functools import partial
+    from knn import KNN
+    from splitter import Matrix, stratified_kfold
+    from crossval import cross_validate, print_report
+
+    iris = Matrix.from_csv("iris.data")
+    res = cross_validate(iris, partial(KNN, 5), stratified_kfold(iris.labels, 10, seed=1))
+    print_report(res)
+
+The model factory is called to make a fresh model for each fold, and the
+model needs fit(x, y) and predict(x) methods. The factory must be a
+top level function or class (or a functools.partial of one) so it can be
+sent to the worker processes. The splits are made first in this process,
+and the folds are run in a pool of processes. The results are collected
+in fold order, so all the metrics are the same for the same splits
+whatever the number of workers; only the timings change.
+
+Usage: python crossval.py [workers] [seed]
+    runs 10-fold and repeated holdout at 0.7 and 0.83 with k-NN on iris
+"""
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+from statistics import mean, pstdev
+
+_matrix = None  # the data set, set in each worker process
+
+
+def _init(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+# fit and test a model on one fold, using the worker's data set
+def _run_fold(task):
+    fold, factory, train, test = task
+    classes = _matrix.classes()
+    train_x, train_y = _matrix.view(train).xy()
+    test_x, test_y = _matrix.view(test).xy()
+    start = time.time()
+    model = factory().fit(train_x, train_y)
+    fitted = time.time()
+    predicted = model.predict(test_x)
+    done = time.time()
+    pos = {c: i for i, c in enumerate(classes)}
+    confusion = [[0] * len(classes) for _ in classes]   # rows are true, columns predicted
+    for t, p in zip(test_y, predicted):
+        confusion[pos[t]][pos[p]] += 1
+    return {
+        'fold': fold,
+        'train': len(train),
+        'test': len(test),
+        'accuracy': sum(confusion[i][i] for i in range(len(classes))) / len(test),
+        'confusion': confusion,
+        'fit_time': fitted - start,
+        'predict_time': done - fitted,
+    }
+
+
+def cross_validate(matrix, factory, splits, workers=None):
+    """Fit and test a new model for each (train, test) split of matrix.
+
+    Returns a dict of the class order, the per fold results, the total
+    confusion matrix, the mean and standard deviation of accuracy, and
+    the precision and recall of each class over all folds.
+    """
+    tasks = [(fold, factory, train, test) for fold, (train, test) in enumerate(splits, 1)]
+    start = time.time()
+    if workers == 1:
+        _init(matrix)
+        folds = list(map(_run_fold, tasks))
+    else:
+        with Pool(workers, _init, (matrix,)) as pool:
+            folds = pool.map(_run_fold, tasks)
+    took = time.time() - start
+    classes = matrix.classes()
+    n = len(classes)
+    total = [[sum(f['confusion'][i][j] for f in folds) for j in range(n)] for i in range(n)]
+    precision = {}
+    recall = {}
+    for i, c in enumerate(classes):
+        predicted = sum(total[r][i] for r in range(n))
+        actual = sum(total[i])
+        precision[c] = total[i][i] / predicted if predicted else 0.0
+        recall[c] = total[i][i] / actual if actual else 0.0
+    accs = [f['accuracy'] for f in folds]
+    return {
+        'classes': classes,
+        'folds': folds,
+        'confusion': total,
+        'accuracy': mean(accs) if accs else 0.0,
+        'accuracy_std': pstdev(accs) if accs else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'time': took,
+    }
+
+
+def print_report(res, title='Cross-validation', file=sys.stdout):
+    print('{}: {} folds, accuracy {:.4f} +- {:.4f} in {:.3f} seconds\n'.format(
+          title, len(res['folds']), res['accuracy'], res['accuracy_std'], res['time']), file=file)
+    print('{:>5} {:>6} {:>5} {:>9} {:>9} {:>11}'.format(
+          'fold', 'train', 'test', 'accuracy', 'fit ms', 'predict ms'), file=file)
+    for f in res['folds']:
+        print('{:>5} {:>6} {:>5} {:9.4f} {:9.2f} {:11.2f}'.format(
+              f['fold'], f['train'], f['test'], f['accuracy'],
+              f['fit_time'] * 1000, f['predict_time'] * 1000), file=file)
+    width = max(map(len, res['classes']))
+    print('\n{:<{w}} {:>9} {:>9}'.format('class', 'precision', 'recall', w=width), file=file)
+    for c in res['classes']:
+        print('{:<{w}} {:9.4f} {:9.4f}'.format(c, res['precision'][c], res['recall'][c], w=width),
+              file=file)
+    print('\nconfusion matrix, rows are true class, columns predicted:', file=file)
+    for c, row in zip(res['classes'], res['confusion']):
+        print('{:<{w}} {}'.format(c, ' '.join('{:>5}'.format(v) for v in row), w=width), file=file)
+    print(file=file)
+
+
+if __name__ == '__main__':
+    from knn import KNN
+    from splitter import Matrix, stratified_kfold, repeated_subsample
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    iris = Matrix.from_csv("iris.data")
+    model = partial(KNN, 5)
+    print_report(cross_validate(iris, model, stratified_kfold(iris.labels, 10, seed), workers),
+                 '10-fold')
+    for p in (0.7, 0.83):
+        print_report(cross_validate(iris, model, repeated_subsample(iris.labels, p, 20, seed),
+                                    workers), 'Holdout {} x 20'.format(p))
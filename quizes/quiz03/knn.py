@@ -0,0 +1,159 @@
+"""k-nearest-neighbour classifier for the iris data, with a KD-tree index.
+
+The training rows are kept packed in one array of floats. A KD-tree over
+them answers each query by visiting only the few leaves near the query
+point, so query time grows roughly with log n instead of n. A brute force
+index that measures the distance to every training row is also provided
+for comparison; both give exactly the same neighbours.
+
+    from knn import KNN
+    from Train_Test import holdout
+
+    train, test = holdout(0.7)[:2]
+    train_x, train_y = train.xy()
+    test_x, test_y = test.xy()
+    model = KNN(k=5).fit(train_x, train_y)
+    predicted = model.predict(test_x)
+    print(model.score(test_x, test_y))
+
+Neighbours are ordered by distance, then by training row number, so
+ties always come out the same way.
+"""
+import time
+from array import array
+from collections import Counter
+from heapq import heappush, heapreplace, nsmallest
+from itertools import chain, repeat
+from math import dist
+
+
+class BruteIndex:
+    """Finds nearest neighbours by measuring the distance to every point."""
+
+    def __init__(self, points):
+        points = [tuple(map(float, p)) for p in points]
+        self.dim = len(points[0]) if points else 0
+        self.cols = [array('d', col) for col in zip(*points)]
+        self.size = len(points)
+
+    def query(self, q, k):
+        dists = list(map(dist, zip(*self.cols), repeat(tuple(q))))
+        return nsmallest(k, range(self.size), key=dists.__getitem__)
+
+
+class KDTree:
+    """Finds nearest neighbours with a KD-tree over the points.
+
+    Each node splits its points at the median of one coordinate, cycling
+    through the coordinates with depth, until there are at most leafsize
+    points. The points are reordered so that each leaf is one contiguous
+    block of the packed array.
+    """
+
+    def __init__(self, points, leafsize=16):
+        points = [tuple(map(float, p)) for p in points]
+        d = self.dim = len(points[0]) if points else 0
+        self.size = len(points)
+        self.leafsize = leafsize
+        order = list(range(self.size))
+        # nodes are (lo, hi, dim, split, left, right), left is -1 for a leaf
+        self.nodes = []
+        stack = [(0, self.size, 0, None)]   # (lo, hi, depth, parent slot)
+        while stack:
+            lo, hi, depth, slot = stack.pop()
+            node = len(self.nodes)
+            if slot is not None:
+                parent, side = slot
+                self.nodes[parent][side] = node
+            if hi - lo <= leafsize:
+                self.nodes.append([lo, hi, 0, 0.0, -1, -1])
+                continue
+            k = depth % d
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: points[i][k])
+            mid = (lo + hi) // 2
+            self.nodes.append([lo, hi, k, points[order[mid]][k], -1, -1])
+            stack.append((mid, hi, depth + 1, (node, 5)))
+            stack.append((lo, mid, depth + 1, (node, 4)))
+        self.nodes = [tuple(n) for n in self.nodes]
+        self.index = array('q', order)  # original row number of each position
+        self.data = array('d', chain.from_iterable(points[i] for i in order))
+
+    def query(self, q, k):
+        q = tuple(q)
+        d = self.dim
+        data = self.data
+        index = self.index
+        nodes = self.nodes
+        heap = []   # worst neighbour first, as (-distance, -row number)
+
+        def visit(node):
+            lo, hi, dim, split, left, right = nodes[node]
+            if left < 0:
+                pts = zip(*[data[lo*d + j : hi*d : d] for j in range(d)])
+                for pos, dd in enumerate(map(dist, pts, repeat(q)), lo):
+                    item = (-dd, -index[pos])
+                    if len(heap) < k:
+                        heappush(heap, item)
+                    elif item > heap[0]:
+                        heapreplace(heap, item)
+                return
+            diff = q[dim] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            # the far side can only have closer points if the split is closer
+            if len(heap) < k or abs(diff) <= -heap[0][0]:
+                visit(far)
+
+        if self.size and k > 0:
+            visit(0)
+        return [-i for dd, i in sorted(heap, reverse=True)]
+
+
+class KNN:
+    """k-nearest-neighbour classifier, index is 'kdtree' or 'brute'."""
+
+    def __init__(self, k=5, index='kdtree', leafsize=16):
+        self.k = k
+        self.index_type = index
+        self.leafsize = leafsize
+
+    def fit(self, x, y):
+        if self.index_type == 'kdtree':
+            self.index = KDTree(x, self.leafsize)
+        elif self.index_type == 'brute':
+            self.index = BruteIndex(x)
+        else:
+            raise ValueError('unknown index type: %r' % self.index_type)
+        self.labels = list(y)
+        return self
+
+    def neighbours(self, q):
+        return self.index.query(q, self.k)
+
+    def predict_one(self, q):
+        # majority vote, a tie goes to the label of the nearest of them
+        labels = [self.labels[i] for i in self.neighbours(q)]
+        counts = Counter(labels)
+        most = max(counts.values())
+        return next(label for label in labels if counts[label] == most)
+
+    def predict(self, x):
+        return [self.predict_one(q) for q in x]
+
+    def score(self, x, y):
+        y = list(y)
+        return sum(p == t for p, t in zip(self.predict(x), y)) / len(y)
+
+
+if __name__ == '__main__':
+    from Train_Test import holdout
+
+    train, test = holdout(0.7)[:2]
+    train_x, train_y = train.xy()
+    test_x, test_y = test.xy()
+    for index in ('kdtree', 'brute'):
+        start = time.time()
+        model = KNN(5, index).fit(train_x, train_y)
+        acc = model.score(test_x, test_y)
+        print('{:<6} k=5 train {} test {} accuracy {:.3f} in {:.4f} seconds'.format(
+              index, len(train_y), len(test_y), acc, time.time() - start))
@@ -0,0 +1,169 @@
+"""Train/test splits of a feature matrix made from row index arrays only.
+
+The features of all the rows are packed in one array of floats in a
+Matrix, with a list of labels. Splits are arrays of row numbers, and a
+View of a matrix for some row numbers gives its rows as memoryview slices
+of the one array, so no row is ever copied:
+
+    from splitter import Matrix, stratified_holdout, stratified_kfold
+
+    iris = Matrix.from_csv("iris.data")
+    train, test = stratified_holdout(iris.labels, 0.7, seed=1)
+    train_x, train_y = iris.view(train).xy()
+
+    for train, test in stratified_kfold(iris.labels, 10, seed=1):
+        ...
+
+The split functions only need the labels (or just the number of rows),
+work for any number of classes, and give the same splits for the same
+seed. Rows of each split are in random order, use sorted() on the index
+array for row order.
+"""
+import csv
+import random
+from array import array
+from collections.abc import Sequence
+
+
+class Matrix:
+    """Feature rows packed in one array of floats, with a label per row."""
+
+    def __init__(self, rows, labels):
+        self.x = array('d')
+        self.dim = None
+        for row in rows:
+            self.x.extend(row)
+            if self.dim is None:
+                self.dim = len(self.x)
+        self.dim = self.dim or 0
+        self.labels = list(labels)
+        if len(self.x) != self.dim * len(self.labels):
+            raise ValueError('rows must all have %d features, one per label' % self.dim)
+        self._mv = memoryview(self.x)
+
+    @classmethod
+    def from_csv(cls, path, features=4, header=True):
+        """Read rows of features then a label, skipping blank lines."""
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            if header: next(reader, None)
+            rows = [r for r in reader if r]
+        return cls((map(float, r[:features]) for r in rows), (r[features] for r in rows))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def row(self, i):
+        """Get the features of row i as a memoryview of the packed array."""
+        return self._mv[i * self.dim:(i + 1) * self.dim]
+
+    def view(self, index):
+        return View(self, index)
+
+    def classes(self):
+        """Get the labels in the order they are first seen."""
+        return list(dict.fromkeys(self.labels))
+
+
+class View(Sequence):
+    """Rows of a Matrix picked by an array of row numbers, without copying."""
+
+    def __init__(self, matrix, index):
+        self.matrix = matrix
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return View(self.matrix, self.index[i])
+        return self.matrix.row(self.index[i])
+
+    @property
+    def labels(self):
+        labels = self.matrix.labels
+        return [labels[i] for i in self.index]
+
+    def xy(self):
+        """Get the feature rows and the labels of the view."""
+        return self, self.labels
+
+    def by_class(self):
+        """Get a dict of a View for each label, in the order first seen."""
+        return {label: View(self.matrix, idx)
+                for label, idx in class_indices(self.labels, self.index).items()}
+
+
+# get a dict of the row numbers of each label, in the order first seen
+#   rows gives the row number of each label if they are not just 0 to n-1
+def class_indices(labels, rows=None):
+    groups = {}
+    for i, label in zip(range(len(labels)) if rows is None else rows, labels):
+        idx = groups.get(label)
+        if idx is None:
+            idx = groups[label] = array('q')
+        idx.append(i)
+    return groups
+
+
+def _shuffled(idx, rnd):
+    idx = array('q', idx)
+    rnd.shuffle(idx)
+    return idx
+
+
+def random_holdout(n, p, seed=None):
+    """Split row numbers 0 to n-1 at random, fraction p for training."""
+    idx = _shuffled(range(n), random.Random(seed))
+    cut = int(p * n)
+    return idx[:cut], idx[cut:]
+
+
+def stratified_holdout(labels, p, seed=None):
+    """Split rows at random, fraction p of each class for training."""
+    rnd = random.Random(seed)
+    train, test = array('q'), array('q')
+    for idx in class_indices(labels).values():
+        idx = _shuffled(idx, rnd)
+        cut = int(p * len(idx))
+        train.extend(idx[:cut])
+        test.extend(idx[cut:])
+    return train, test
+
+
+def stratified_kfold(labels, k, seed=None):
+    """Yield k (train, test) splits where each row is tested once.
+
+    The rows of each class are shuffled and dealt to the k folds in turn,
+    so each fold has about 1/k of every class.
+    """
+    rnd = random.Random(seed)
+    folds = [array('q') for _ in range(k)]
+    start = 0
+    for idx in class_indices(labels).values():
+        idx = _shuffled(idx, rnd)
+        for f in range(k):
+            # carry on dealing from the fold after the last class ended
+            folds[(start + f) % k].extend(idx[f::k])
+        start = (start + len(idx)) % k
+    for f in range(k):
+        train = array('q')
+        for g in range(k):
+            if g != f: train.extend(folds[g])
+        yield train, folds[f]
+
+
+def repeated_subsample(labels, p, repeats, seed=None, stratified=True):
+    """Yield repeated random holdout splits, fraction p for training.
+
+    Each repeat gets its own seed from the given seed, so any one repeat
+    can be made again on its own.
+    """
+    rnd = random.Random(seed)
+    for _ in range(repeats):
+        sub = rnd.getrandbits(64)
+        if stratified:
+            yield stratified_holdout(labels, p, sub)
+        else:
+            yield random_holdout(len(labels), p, sub)
@@ -1,40 +1,21 @@
-import csv
-from random import shuffle
+from collections import Counter
+from splitter import Matrix, random_holdout
 
+iris = Matrix.from_csv("iris.data")
 
-with open("iris.data", 'r') as f:
-    reader = csv.reader(f)
-    data = list(reader)[:-1]
 
-
-def holdout(dat, p):
-    ind = list(range(1, 151))
-    shuffle(ind)
-    x_train = []
-    x_test = []
-    for i in ind[:int(p*len(ind))]:
-        x_train.append(dat[i])
-    for j in ind[int(p*len(ind)):]:
-        x_test.append(dat[j])
-    return x_train, x_test
+def holdout(p, seed=None):
+    train, test = random_holdout(len(iris), p, seed)
+    return iris.view(train), iris.view(test)
 
 
 def count_labels(dat1):
-    c_setosa = 0
-    c_versicolor = 0
-    c_virginica = 0
-    for i in range(len(dat1)):
-        if dat1[i][4] == 'Iris-versicolor':
-            c_versicolor += 1
-        elif dat1[i][4] == 'Iris-virginica':
-            c_virginica += 1
-        elif dat1[i][4] == 'Iris-setosa':
-            c_setosa += 1
-    return [c_setosa, c_versicolor, c_virginica]
+    counts = Counter(dat1.labels)
+    return [counts['Iris-setosa'], counts['Iris-versicolor'], counts['Iris-virginica']]
 
 
 def get_output(p):
-    res = holdout(data, p)
+    res = holdout(p)
     train = res[0]
     test = res[1]
     x_tr = count_labels(train)
@@ -55,14 +36,17 @@ def get_output(p):
     display_top_5_y(test)
 
 
+# the index shown is the 1-based number of the data row in iris.data,
+# not counting the header line
 def display_top_5_x(dat02):
-    for e in dat02[:4]:
-        print("index: {:<5} {}".format(data.index(e), e[:4]))
+    for i in dat02.index[:4]:
+        print("index: {:<5} {}".format(i + 1, [str(v) for v in iris.row(i)]))
 
 
 def display_top_5_y(dat03):
-    for e in dat03[:4]:
-        print("index: {:<5} {}".format(data.index(e), e[-1]))
+    for i in dat03.index[:4]:
+        print("index: {:<5} {}".format(i + 1, iris.labels[i]))
 
 
-get_output(0.83)  # please adjust the fraction here
\ No newline at end of file
+if __name__ == '__main__':
+    get_output(0.83)  # please adjust the fraction here
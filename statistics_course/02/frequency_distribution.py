@@ -1,3 +1,8 @@
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from histogram import Histogram
+
 data = \
 [87, 51, 56, 59, 90, 67, 74, 96, 73, 80,
  92, 68, 92, 79, 95, 68, 87, 93, 91, 80,
@@ -17,41 +22,6 @@ def make_class(low, c, width):
     return res
 
 
-def count_frequency(li, min_n, max_n):
-    ctr = 0
-    for x in li:
-        if min_n <= x <= max_n:
-            ctr += 1
-    return ctr
-
-
-def count_freq_in_range(class_lim):
-    res = []
-    for elem in class_lim:
-        res.append(count_frequency(data, elem[0], elem[1]))
-    return res
-
-
-def cal_le_th(fre):
-    init = 0
-    res = []
-    for e in fre:
-        init += e
-        res.append(init)
-    return res
-
-
-def cal_mo_th(fre):
-    init = 0
-    length = len(data)
-    res = []
-    for e in fre:
-        length -= init
-        res.append(length)
-        init = e
-    return res
-
-
 def display_frequency_table(low, c, width):
     tot = len(data)
     class_lim = make_class(low, c, width)
@@ -59,10 +29,12 @@ def display_frequency_table(low, c, width):
 
     class_bds = [[e[0] - 0.5, e[1] + 0.5] for e in class_lim]
     fomat_bds = ['{} - {}'.format(e[0], e[1]) for e in class_bds]
-    fre_count = count_freq_in_range(class_lim)
-    rela_fre  = [e/tot for e in fre_count]
-    re_les_th = cal_le_th(fre_count)
-    re_mo_th = cal_mo_th(fre_count)
+    hist = Histogram([e[0] for e in class_bds] + [class_bds[-1][1]]).add(data)
+    table = hist.table()
+    fre_count = [r['freq'] for r in table]
+    rela_fre  = [r['rel'] for r in table]
+    re_les_th = [r['cum'] for r in table]
+    re_mo_th = [r['more'] for r in table]
     cu_les_th = [e / tot for e in re_les_th]
     cu_mo_th = [e / tot for e in re_mo_th]
     print("  Limit      Bds        Freq   RelFre  re_les   re_mo_th   cu_les_th  cu_mo_th ")
@@ -1,3 +1,8 @@
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from stemleaf import StemLeaf
+
 data = \
 [87, 51, 56, 59, 90, 67, 74, 96, 73, 80,
  92, 68, 92, 79, 95, 68, 87, 93, 91, 80,
@@ -5,32 +10,6 @@ data = \
  49, 79, 65, 62, 70, 76, 87, 74, 63, 94,
  86, 86, 69, 88, 89, 97, 91, 54, 83, 73]
 
-sorted_data = sorted(data)
-
-stem_lef = {}
-temp = []
-keys = []
-
-for num in sorted_data:
-    key = num // 10
-    value = num % 10
-    if key not in keys:
-        keys.append(key)
-        temp.clear()
-        temp.append(value)
-        new_list = temp.copy()
-        stem_lef[key] = new_list
-    else:
-        temp.append(value)
-        new_list = temp.copy()
-        stem_lef[key] = new_list
+# count the leaves of each stem in one pass, no sorting needed
+stem_lef = StemLeaf().add(data).as_dict()
 print(stem_lef)
-
-
-
-
-
-
-
-
-
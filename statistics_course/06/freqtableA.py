@@ -1,7 +1,11 @@
 #!/usr/bin/python3
 
+import os, sys
 from math import ceil
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from histogram import Histogram, print_table
+
 dat = [ 87, 51, 56, 59, 90, 67, 74, 96, 73, 80,
         92, 68, 92, 79, 95, 68, 87, 93, 91, 80,
         65, 92, 77, 94, 89, 74, 96, 85, 93, 72,
@@ -21,28 +25,7 @@ print("so bounds are", bnds)
 print()
 
 # count the frequencies of the data for each interval
-freq = [0 for x in range(10)]
-for v in dat:
-    for i in range(len(bnds)-1):
-        if v < bnds[i+1]:
-            freq[i] += 1
-            break
+hist = Histogram(bnds).add(dat)
 
 # display the frequency table
-tot = len(dat)
-cum = 0
-relcum = 0
-print(" Row   Limits   Boundaries  Freq Cum  More RelFreq CumRel  MoreRel ")
-print("+----+--------+------------+----+----+----+-------+-------+-------+")
-for i in range(len(bnds)-1):
-    low = round(bnds[i] + 0.5)
-    high = round(bnds[i+1] - 0.5)
-    cum += freq[i]
-    rel = freq[i] / tot
-    relcum += rel
-    more = tot - cum + freq[i]
-    relmore = 1 - relcum + rel
-    print("| %2d | %2d--%2d | %4.1f--%4.1f | %2d | %2d | %2d | %5.3f | %5.3f | %5.3f |"
-        % (i+1, low, high, bnds[i], bnds[i+1], freq[i], cum, more, rel, relcum, relmore))
-
-print("+----+--------+------------+----+----+----+-------+-------+-------+")
+print_table(hist)
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+# frequency table of a huge number of temperature readings in one pass
+#   usage: python freqtableC.py [readings] [workers] [hist|kll]
+#   each worker makes a sketch of its own chunks of readings, the sketches
+#   are merged and the table is made from the merged sketch
+
+import os, sys, random, time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from histogram import print_table
+from sketch import KLL, AdaptiveHistogram, table_histogram
+
+CHUNK = 1 << 16
+
+readings = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+kind = sys.argv[3] if len(sys.argv) > 3 else 'hist'
+if kind not in ('hist', 'kll'):
+    sys.exit("the sketch must be hist or kll, not %r" % kind)
+nchunks = -(-readings // CHUNK)
+
+# sketch chunks start, start+step, ... of the readings, made up here as
+# whole degree temperatures, with a seed per chunk so any split is the same
+def sketch_chunks(task):
+    start, step = task
+    # a KLL seed per worker gives the same estimates on every run, and
+    # 256 centroids are enough to keep every whole degree exactly
+    sk = KLL(seed=start) if kind == 'kll' else AdaptiveHistogram(maxbins=256)
+    for c in range(start, nchunks, step):
+        rnd = random.Random(c)
+        n = min(CHUNK, readings - c * CHUNK)
+        sk.add(round(rnd.gauss(60, 15)) for _ in range(n))
+    return sk
+
+if __name__ == '__main__':
+    t = time.time()
+    nworkers = min(workers or os.cpu_count(), nchunks) or 1
+    with Pool(nworkers) as pool:
+        parts = pool.map(sketch_chunks, [(w, nworkers) for w in range(nworkers)])
+    sk = parts[0]
+    for p in parts[1:]:
+        sk.merge(p)
+    print(readings, "readings from", sk.min, "to", sk.max, "sketched by", kind,
+          "in %.2f seconds" % (time.time() - t))
+    print()
+    print_table(table_histogram(sk))
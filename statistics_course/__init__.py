@@ -0,0 +1,6 @@
+"""Shared statistics modules for the course scripts.
+
+The scripts in 02/ and 06/ are run directly rather than as part of a
+package, so each one puts this directory first on sys.path to import
+histogram, sketch and stemleaf.
+"""
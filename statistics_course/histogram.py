@@ -0,0 +1,124 @@
+"""Frequency distributions of data in bins, counted in one pass.
+
+A Histogram is set up with the list of bin boundaries b0 < b1 < ... < bn.
+A value v is counted in bin i when b[i] <= v < b[i+1], found by binary
+search, so counting n values takes O(n log bins) instead of checking
+every bin for every value. Values can be added in chunks as they are
+read, so the data never needs to be held in memory:
+
+    from histogram import Histogram, print_table
+
+    hist = Histogram.equal(48.5, 5, 10)     # 10 bins 5 wide from 48.5
+    for chunk in chunks:
+        hist.add(chunk)
+    print_table(hist)
+
+Values below b0 or from bn up are counted as under and over, and are
+only in the total. Histograms with the same boundaries can be merged.
+"""
+from bisect import bisect_right
+from collections import Counter
+from itertools import islice, repeat
+
+
+class Histogram:
+    """Counts of values in bins between a list of boundaries."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        if len(self.bounds) < 2:
+            raise ValueError('need at least 2 boundaries for 1 bin')
+        self.counts = [0] * (len(self.bounds) - 1)
+        self.under = 0      # number of values below the first boundary
+        self.over = 0       # number of values from the last boundary up
+        self.total = 0      # number of all values added
+
+    @classmethod
+    def equal(cls, low, width, nbins):
+        """Make a Histogram of nbins bins of the same width from low."""
+        return cls([low + i * width for i in range(nbins + 1)])
+
+    def add(self, values):
+        """Count a chunk (any iterable) of values."""
+        nbins = len(self.counts)
+        found = Counter(map(bisect_right, repeat(self.bounds), values))
+        for i, n in found.items():
+            if i == 0:
+                self.under += n
+            elif i > nbins:
+                self.over += n
+            else:
+                self.counts[i - 1] += n
+            self.total += n
+        return self
+
+    def add_stream(self, values, chunk=1 << 16):
+        """Count all the values of an iterator, a chunk at a time."""
+        values = iter(values)
+        while True:
+            block = list(islice(values, chunk))
+            if not block: break
+            self.add(block)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another Histogram with the same boundaries."""
+        if other.bounds != self.bounds:
+            raise ValueError('cannot merge histograms with different boundaries')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.under += other.under
+        self.over += other.over
+        self.total += other.total
+        return self
+
+    def table(self):
+        """Get the frequency table as a list of dicts, one per bin.
+
+        Each has the row number, lower and upper limits (for whole
+        numbers) and boundaries, the frequency, cumulative frequency,
+        the "more than" frequency (of this bin and above), and the
+        relative frequency of each as a fraction of the total.
+        """
+        rows = []
+        tot = self.total
+        cum = 0
+        relcum = 0
+        for i, freq in enumerate(self.counts):
+            cum += freq
+            rel = freq / tot
+            relcum += rel
+            rows.append({
+                'row': i + 1,
+                'low': round(self.bounds[i] + 0.5),
+                'high': round(self.bounds[i + 1] - 0.5),
+                'lowbnd': self.bounds[i],
+                'highbnd': self.bounds[i + 1],
+                'freq': freq,
+                'cum': cum,
+                'more': tot - cum + freq,
+                'rel': rel,
+                'relcum': relcum,
+                'relmore': 1 - relcum + rel,
+            })
+        return rows
+
+
+# print a frequency table of a Histogram with rows, limits and boundaries
+#   the columns widen to fit big numbers
+def print_table(hist, file=None):
+    rows = hist.table()
+    rw = max([2] + [len('%d' % r['row']) for r in rows])
+    lw = max([2] + [len('%d' % r[k]) for r in rows for k in ('low', 'high')])
+    bw = max([4] + [len('%.1f' % r[k]) for r in rows for k in ('lowbnd', 'highbnd')])
+    fw = max(2, len('%d' % hist.total))
+    widths = [rw + 2, 2*lw + 4, 2*bw + 4, fw + 2, fw + 2, fw + 2, 7, 7, 7]
+    labels = ['Row', 'Limits', 'Boundaries', 'Freq', 'Cum', 'More', 'RelFreq', 'CumRel', 'MoreRel']
+    head = [(' ' * ((w - len(s)) // 2) + s).ljust(w) for s, w in zip(labels, widths)]
+    rule = '+' + '+'.join('-' * w for w in widths) + '+'
+    lines = [' ' + ' '.join(head) + ' ', rule]
+    for r in rows:
+        lines.append("| %*d | %*d--%*d | %*.1f--%*.1f | %*d | %*d | %*d | %5.3f | %5.3f | %5.3f |"
+            % (rw, r['row'], lw, r['low'], lw, r['high'], bw, r['lowbnd'], bw, r['highbnd'],
+               fw, r['freq'], fw, r['cum'], fw, r['more'], r['rel'], r['relcum'], r['relmore']))
+    lines.append(rule)
+    print('\n'.join(lines), file=file)
@@ -0,0 +1,267 @@
+"""One pass, fixed memory sketches of huge data for frequency tables.
+
+The frequency tables need the min and max of the data before the bins
+can be chosen, and then a second pass to count the values in each bin.
+A sketch is built in one pass in a fixed amount of memory, keeps the
+exact count, min and max, and can estimate how many values are below
+any number, so the bins can be chosen and counted afterwards:
+
+    from sketch import AdaptiveHistogram, table_histogram
+    from histogram import print_table
+
+    sk = AdaptiveHistogram()
+    for chunk in chunks:
+        sk.add(chunk)
+    print_table(table_histogram(sk))
+
+Sketches of separate chunks of the data, for example built in separate
+processes, can be combined with merge(). Two kinds are provided:
+
+    KLL                 a KLL quantile sketch: the values are kept in
+                        levels of sorted samples, each level standing
+                        for twice as many values as the one below. The
+                        rank error is a small fraction of the count.
+
+    AdaptiveHistogram   a streaming histogram of at most maxbins
+                        centroids (value, count), merging the two
+                        closest centroids when there are too many.
+
+An AdaptiveHistogram is exact while there are at most maxbins distinct
+values, so data sets with few distinct values give exactly the same
+table as counting every value. A KLL sketch is only exact until it has
+been given more than k values; after that its counts are estimates even
+when there are only a few distinct values. Give KLL a seed to make its
+random choices, and so its estimates, the same on every run.
+"""
+import random
+from bisect import bisect_left
+from collections import Counter
+from heapq import heapify, heappush, heappop
+from math import ceil, inf, nextafter
+from operator import mul
+
+from histogram import Histogram
+
+
+class KLL:
+    """Mergeable KLL quantile sketch of at most about 3k values."""
+
+    def __init__(self, k=200, c=2/3, seed=None):
+        self.k = k
+        self.c = c
+        self.seed = seed
+        self.rnd = random.Random(seed)
+        self.compactors = [[]]  # level h holds values that each stand for 2**h
+        self.n = 0
+        self.min = None
+        self.max = None
+
+    def _capacity(self, h):
+        levels = len(self.compactors)
+        return int(ceil(self.k * self.c ** (levels - h - 1))) + 1
+
+    def _size(self):
+        return sum(map(len, self.compactors))
+
+    def _maxsize(self):
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        # halve the lowest full level into the next one up, until it all fits
+        while self._size() >= self._maxsize():
+            for h, level in enumerate(self.compactors):
+                if len(level) >= self._capacity(h):
+                    if h + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    level.sort()
+                    # an odd one out stays at this level so no weight is lost
+                    keep = [level.pop()] if len(level) % 2 else []
+                    self.compactors[h + 1].extend(level[self.rnd.random() < 0.5::2])
+                    self.compactors[h] = keep
+                    break
+
+    def _update(self, n, lo, hi):
+        self.n += n
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    def add(self, values):
+        """Add a chunk (any iterable) of values."""
+        values = list(values)
+        if not values: return self
+        self._update(len(values), min(values), max(values))
+        # feed the values in pieces of about one level, then compress
+        step = self._capacity(0)
+        for i in range(0, len(values), step):
+            self.compactors[0].extend(values[i:i + step])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Add the values of another KLL sketch into this one."""
+        if not other.n: return self
+        self._update(other.n, other.min, other.max)
+        for h, level in enumerate(other.compactors):
+            if h == len(self.compactors):
+                self.compactors.append([])
+            self.compactors[h].extend(level)
+        self._compress()
+        return self
+
+    def count_below(self, x):
+        """Estimate the number of values less than x."""
+        total = 0
+        for h, level in enumerate(self.compactors):
+            level.sort()
+            total += bisect_left(level, x) << h
+        return total
+
+    def quantile(self, q):
+        """Estimate the value with a fraction q of the values below it."""
+        items = sorted((v, 1 << h) for h, level in enumerate(self.compactors) for v in level)
+        want = q * self.n
+        cum = 0
+        for v, w in items:
+            cum += w
+            if cum >= want: return v
+        return self.max
+
+
+class AdaptiveHistogram:
+    """Mergeable streaming histogram of at most maxbins (value, count) centroids."""
+
+    def __init__(self, maxbins=64):
+        self.maxbins = maxbins
+        self.values = []    # centroid values in order
+        self.counts = []    # number of values in each centroid
+        self.exact = True   # no centroids have been merged yet
+        self.n = 0
+        self.min = None
+        self.max = None
+
+    def _combine(self, pairs):
+        # add (value, count) pairs to the centroids and shrink to maxbins
+        merged = Counter(dict(zip(self.values, self.counts)))
+        for v, c in pairs:
+            merged[v] += c
+        vals = sorted(merged)
+        cnts = [merged[v] for v in vals]
+        if len(vals) > self.maxbins:
+            vals, cnts = _shrink(vals, cnts, self.maxbins)
+            self.exact = False
+        self.values, self.counts = vals, cnts
+
+    def add(self, values):
+        """Add a chunk (any iterable) of values."""
+        found = Counter(values)
+        if not found: return self
+        self.n += sum(found.values())
+        lo, hi = min(found), max(found)
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        pairs = found.items()
+        if len(found) > 16 * self.maxbins:
+            # first make runs of the sorted values into centroids, so that
+            # shrinking only has to merge a few times maxbins centroids
+            vals = sorted(found)
+            step = ceil(len(vals) / (16 * self.maxbins))
+            pairs = []
+            for i in range(0, len(vals), step):
+                run = vals[i:i + step]
+                cnts = [found[v] for v in run]
+                total = sum(cnts)
+                pairs.append((sum(map(mul, run, cnts)) / total, total))
+            self.exact = False
+        self._combine(pairs)
+        return self
+
+    def merge(self, other):
+        """Add the values of another AdaptiveHistogram into this one."""
+        if not other.n: return self
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._combine(zip(other.values, other.counts))
+        return self
+
+    def count_below(self, x):
+        """Estimate the number of values less than x."""
+        vals, cnts = self.values, self.counts
+        i = bisect_left(vals, x)    # centroids below x
+        if self.exact or not vals:
+            return sum(cnts[:i])
+        # otherwise assume each centroid's values are spread half each side
+        # of it, and interpolate between centroids (Ben-Haim and Tom-Tov)
+        if i == 0:
+            if x <= self.min: return 0
+            return cnts[0] / 2 * (x - self.min) / (vals[0] - self.min)
+        if i == len(vals):
+            if x > self.max: return self.n
+            return self.n - cnts[-1] / 2 * (self.max - x) / (self.max - vals[-1])
+        p0, p1, m0, m1 = vals[i-1], vals[i], cnts[i-1], cnts[i]
+        frac = (x - p0) / (p1 - p0)
+        mx = m0 + (m1 - m0) * frac
+        return sum(cnts[:i-1]) + m0 / 2 + (m0 + mx) / 2 * frac
+
+
+# merge the closest neighbouring centroids until there are maxbins left
+def _shrink(vals, cnts, maxbins):
+    n = len(vals)
+    vals, cnts = list(vals), list(cnts)
+    nxt = list(range(1, n)) + [-1]
+    prv = list(range(-1, n - 1))
+    ver = [0] * n   # changes when a centroid moves, to spot old gaps
+    heap = [(vals[i+1] - vals[i], i, i + 1, 0, 0) for i in range(n - 1)]
+    heapify(heap)
+    left = n
+    while left > maxbins:
+        gap, i, j, vi, vj = heappop(heap)
+        if ver[i] != vi or ver[j] != vj or nxt[i] != j:
+            continue    # one of the pair has moved or gone
+        total = cnts[i] + cnts[j]
+        vals[i] = (vals[i] * cnts[i] + vals[j] * cnts[j]) / total
+        cnts[i] = total
+        ver[i] += 1
+        ver[j] = -1     # gone
+        nxt[i] = nxt[j]
+        if nxt[j] >= 0:
+            prv[nxt[j]] = i
+            heappush(heap, (vals[nxt[i]] - vals[i], i, nxt[i], ver[i], ver[nxt[i]]))
+        if prv[i] >= 0:
+            heappush(heap, (vals[i] - vals[prv[i]], prv[i], i, ver[prv[i]], ver[i]))
+        left -= 1
+    keep = [i for i in range(n) if ver[i] >= 0]
+    return [vals[i] for i in keep], [cnts[i] for i in keep]
+
+
+# get bin boundaries like the freqtable scripts use from the min and max:
+#   for whole numbers, nbins whole number wide bins between half values,
+#   otherwise nbins equal bins from min to just above max, the last bound
+#   is always above max so every value is in a bin, and if min == max
+#   there is just the one bin holding it
+def table_bounds(minv, maxv, nbins=10):
+    if minv == int(minv) and maxv == int(maxv):
+        minv, maxv = int(minv), int(maxv)
+        if minv == maxv:
+            return [minv - 0.5, minv + 0.5]
+        itvl = (maxv - minv) // nbins + 1
+        return [minv - 0.5 + i * itvl for i in range(nbins + 1)]
+    if minv == maxv:
+        return [minv, nextafter(minv, inf)]
+    width = (maxv - minv) / nbins
+    return [minv + i * width for i in range(nbins)] + [nextafter(maxv, inf)]
+
+
+# make a Histogram of the estimated counts of a sketch, to print as a table
+#   bounds are from table_bounds() if not given
+def table_histogram(sketch, bounds=None, nbins=10):
+    if bounds is None:
+        bounds = table_bounds(sketch.min, sketch.max, nbins)
+    hist = Histogram(bounds)
+    below = [min(sketch.n, max(0, round(sketch.count_below(b)))) for b in hist.bounds]
+    hist.counts = [b - a for a, b in zip(below, below[1:])]
+    hist.under = below[0]
+    hist.over = sketch.n - below[-1]
+    hist.total = sketch.n
+    return hist
@@ -0,0 +1,140 @@
+"""Stem and leaf plots built by counting, in one pass.
+
+Each value is cut into a stem and a one digit leaf: with a leaf unit of 1,
+87 has stem 8 and leaf 7; with a leaf unit of 0.1, 8.7 does. A StemLeaf
+only keeps the number of times each leaf is seen on each stem, so adding
+n values takes O(n), and the leaves of a stem come out in order by
+counting instead of sorting. Values can be added in chunks as they are
+read, or found straight from sorted data by jumping between the leaf
+boundaries:
+
+    from stemleaf import StemLeaf
+
+    plot = StemLeaf(unit=1, split=2).add(data)
+    for line in plot.lines():
+        print(line)
+
+With split stems each stem is shown on split lines (1, 2 or 5), each for
+10 // split of the leaves, as for 4* (0-4) and 4. (5-9). Negative values
+use floor division, so -13 has stem -2 and leaf 7, and show in order
+below the stem for 0.
+"""
+from bisect import bisect_left
+from collections import Counter
+from math import floor
+
+
+class StemLeaf:
+    """Leaf counts of values on each stem."""
+
+    def __init__(self, unit=1, split=1):
+        if split not in (1, 2, 5):
+            raise ValueError('split must be 1, 2 or 5, not %r' % split)
+        self.unit = unit
+        self.split = split
+        self.found = Counter()  # number of values of each whole number of units
+        self.total = 0
+
+    def _units(self, x):
+        # whole number of leaf units in x, rounding off float noise as in 0.3 / 0.1
+        if isinstance(x, int) and isinstance(self.unit, int):
+            return x // self.unit
+        return floor(round(x / self.unit, 9))
+
+    def add(self, values):
+        """Count a chunk (any iterable) of values."""
+        found = Counter(values)
+        if not (self.unit == 1 and all(isinstance(v, int) for v in found)):
+            # count the same values once, then move them to their leaf units
+            units = Counter()
+            for v, n in found.items():
+                units[self._units(v)] += n
+            found = units
+        self.found.update(found)
+        self.total += sum(found.values())
+        return self
+
+    @classmethod
+    def from_sorted(cls, values, unit=1, split=1):
+        """Make a StemLeaf from a sorted sequence of values.
+
+        Each run of values with the same leaf is found by binary search,
+        so this takes O(d log n) for d different leaf values.
+        """
+        plot = cls(unit, split)
+        i, n = 0, len(values)
+        while i < n:
+            u = plot._units(values[i])
+            j = bisect_left(values, u + 1, i, key=plot._units)
+            plot.found[u] += j - i
+            plot.total += j - i
+            i = j
+        return plot
+
+    def merge(self, other):
+        """Add the counts of another StemLeaf with the same unit."""
+        if other.unit != self.unit:
+            raise ValueError('cannot merge stem and leaf plots with different units')
+        self.found.update(other.found)
+        self.total += other.total
+        return self
+
+    def stems(self):
+        """Get the stems from the lowest to the highest, with the empty ones between."""
+        if not self.found:
+            return range(0)
+        return range(min(self.found) // 10, max(self.found) // 10 + 1)
+
+    def leaf_counts(self, stem):
+        """Get a list of the number of each leaf 0 to 9 on a stem."""
+        found = self.found
+        return [found.get(stem * 10 + leaf, 0) for leaf in range(10)]
+
+    def counts(self):
+        """Get a dict of the number of values on each stem that has any."""
+        counts = {}
+        for u in sorted(self.found):
+            counts[u // 10] = counts.get(u // 10, 0) + self.found[u]
+        return counts
+
+    def leaves(self, stem):
+        """Get the list of leaves on a stem, in order."""
+        return [leaf for leaf, n in enumerate(self.leaf_counts(stem)) for _ in range(n)]
+
+    def as_dict(self):
+        """Get a dict of the list of leaves of each stem that has any."""
+        return {stem: self.leaves(stem) for stem in self.counts()}
+
+    def lines(self, width=None):
+        """Yield the lines of the plot, one at a time.
+
+        Split stems are marked * for the first line, . for the last and
+        t, f, s for the middle lines of a 5 way split. A line with more
+        than width leaves shows width of them and the number left out.
+        """
+        per = 10 // self.split
+        marks = {1: [''], 2: ['*', '.'], 5: ['*', 't', 'f', 's', '.']}[self.split]
+        stems = self.stems()
+        size = max((len('%d' % s) for s in stems), default=1)
+        for stem in stems:
+            counts = self.leaf_counts(stem)
+            for part, mark in enumerate(marks):
+                run = range(part * per, (part + 1) * per)
+                if width is None:
+                    leaves = ''.join(str(leaf) * counts[leaf] for leaf in run)
+                else:
+                    # only make up to width leaves, the line may have millions
+                    pieces, room = [], width
+                    for leaf in run:
+                        pieces.append(str(leaf) * min(counts[leaf], room))
+                        room -= len(pieces[-1])
+                    leaves = ''.join(pieces)
+                    more = sum(counts[leaf] for leaf in run) - len(leaves)
+                    if more:
+                        leaves += ' (+%d)' % more
+                yield '%*d%s | %s' % (size, stem, mark, leaves)
+
+    def write(self, file, width=None):
+        """Write the plot to a file a line at a time."""
+        for line in self.lines(width):
+            file.write(line + '\n')
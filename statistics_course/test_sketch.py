@@ -0,0 +1,53 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from histogram import Histogram
+from sketch import AdaptiveHistogram, table_bounds, table_histogram
+
+
+# every value from min to max must be in a bin, none under or over
+def binned(bounds, values):
+    hist = Histogram(bounds)
+    hist.add(values)
+    assert hist.under == 0 and hist.over == 0
+    assert sum(hist.counts) == len(values)
+    return hist
+
+
+def test_whole_number_bounds_cover_max():
+    # a range that is a multiple of nbins used to end half a unit below max
+    bounds = table_bounds(-7, 133)
+    assert len(bounds) == 11
+    assert bounds[0] == -7.5 and bounds[-1] > 133
+    binned(bounds, list(range(-7, 134)))
+    for minv, maxv in [(0, 95), (0, 100), (1, 9), (-3, 17), (0, 1)]:
+        bounds = table_bounds(minv, maxv)
+        assert len(bounds) == 11 and bounds[-1] > maxv
+        binned(bounds, list(range(minv, maxv + 1)))
+
+
+def test_float_bounds_cover_max():
+    bounds = table_bounds(0.5, 2.0, 3)
+    assert len(bounds) == 4 and bounds[-1] > 2.0
+    binned(bounds, [0.5, 1.0, 1.25, 2.0])
+
+
+def test_bounds_of_one_value():
+    assert table_bounds(5, 5) == [4.5, 5.5]
+    binned(table_bounds(5, 5), [5, 5, 5])
+    bounds = table_bounds(2.5, 2.5)
+    assert len(bounds) == 2 and bounds[0] == 2.5 < bounds[1]
+    binned(bounds, [2.5, 2.5])
+
+
+def test_table_histogram_counts_all_values():
+    values = [v % 141 - 7 for v in range(3000)]
+    sk = AdaptiveHistogram(maxbins=256)
+    sk.add(values)
+    hist = table_histogram(sk)
+    assert hist.under == 0 and hist.over == 0
+    assert sum(hist.counts) == hist.total == len(values)
+    sk = AdaptiveHistogram()
+    sk.add([4.0] * 10)
+    hist = table_histogram(sk)
+    assert hist.counts == [10]